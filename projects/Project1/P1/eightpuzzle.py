@@ -3,6 +3,58 @@ import random
 
 # Module Classes
 
+class PuzzleTables:
+    """
+    Precomputed move tables for one puzzle size.
+
+    Each cell holds a tile number in bitsPerCell bits of a single integer,
+    cell 0 in the lowest bits.  For every position of the blank, moves[blank]
+    lists the legal moves as (name, target cell, shift) triples, where the
+    target is the cell whose tile slides into the blank.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.numCells = size * size
+        self.bitsPerCell = max(4, (self.numCells - 1).bit_length())
+        self.mask = (1 << self.bitsPerCell) - 1
+        self.goal = self.pack(range(self.numCells))
+        self.moves = []
+        self.targets = []
+        for blank in range(self.numCells):
+            row, col = divmod(blank, size)
+            moves = []
+            if row != 0: moves.append(('up', blank - size))
+            if row != size - 1: moves.append(('down', blank + size))
+            if col != 0: moves.append(('left', blank - 1))
+            if col != size - 1: moves.append(('right', blank + 1))
+            self.moves.append([(name, target, target * self.bitsPerCell) for name, target in moves])
+            self.targets.append(dict(moves))
+        self.moveNames = [[name for name, _, _ in moves] for moves in self.moves]
+
+    def __reduce__(self):
+        # states compare their tables by identity, so unpickle to the shared ones
+        return puzzleTables, (self.size,)
+
+    def pack(self, numbers):
+        packed = 0
+        for cell, number in enumerate(numbers):
+            packed |= number << (cell * self.bitsPerCell)
+        return packed
+
+    def unpack(self, packed):
+        return [(packed >> (cell * self.bitsPerCell)) & self.mask for cell in range(self.numCells)]
+
+
+_tables = {}
+
+def puzzleTables(size):
+    "The shared PuzzleTables for a size x size puzzle"
+    if size not in _tables:
+        _tables[size] = PuzzleTables(size)
+    return _tables[size]
+
+
 class EightPuzzleState:
     """
     The Eight Puzzle is described in the course textbook on
@@ -13,6 +65,8 @@ class EightPuzzleState:
     the EightPuzzleSearchProblem class.
     """
 
+    __slots__ = ('packed', 'blank', 'tables')
+
     def __init__( self, numbers ):
         """
           Constructs a new eight puzzle from an ordering of numbers.
@@ -32,18 +86,35 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        The configuration of the puzzle is packed into a single integer
+        'packed', four bits per cell (more above 4x4), and the cell of the
+        blank is cached in 'blank'.  Moves are looked up in tables shared by all puzzles
+        of the same size (see PuzzleTables).
+
+        Larger sliding-tile puzzles work the same way: a list of the
+        integers 0 to 15 gives the 4x4 fifteen puzzle, and in general the
+        puzzle is size x size for a list of size**2 numbers.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        size = int(round(len(numbers) ** 0.5))
+        if size * size != len(numbers):
+            raise ValueError('A sliding-tile puzzle needs a square number of tiles')
+        self.tables = puzzleTables(size)
+        self.packed = self.tables.pack(numbers)
+        self.blank = list(numbers).index(0)
+
+    @property
+    def size(self):
+        return self.tables.size
+
+    @property
+    def cells(self):
+        "The configuration as a list of rows, built on demand"
+        numbers = self.tables.unpack(self.packed)
+        return [numbers[row * self.size:(row + 1) * self.size] for row in range(self.size)]
+
+    @property
+    def blankLocation(self):
+        return divmod(self.blank, self.size)
 
     def isGoal( self ):
         """
@@ -63,13 +134,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == self.tables.goal
 
     def legalMoves( self ):
         """
@@ -77,21 +142,12 @@ class EightPuzzleState:
 
         Moves consist of moving the blank space up, down, left or right.
         These are encoded as 'up', 'down', 'left' and 'right' respectively.
+        The list is shared between states, so do not modify it.
 
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if(row != 0):
-            moves.append('up')
-        if(row != 2):
-            moves.append('down')
-        if(col != 0):
-            moves.append('left')
-        if(col != 2):
-            moves.append('right')
-        return moves
+        return self.tables.moveNames[self.blank]
 
     def result(self, move):
         """
@@ -99,38 +155,30 @@ class EightPuzzleState:
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legalMoves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves will raise an exception.
 
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
-        else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
+        target = self.tables.targets[self.blank].get(move)
+        if target is None:
+            raise Exception('Illegal Move: ' + str(move))
+        return self.slide(target, target * self.tables.bitsPerCell)
+
+    def slide(self, target, shift):
+        "The state after the tile on cell target, at bit offset shift, moves into the blank"
+        tile = (self.packed >> shift) & self.tables.mask
+        newPuzzle = EightPuzzleState.__new__(EightPuzzleState)
+        # the blank cell holds 0, so moving the tile is a subtraction and an addition
+        newPuzzle.packed = self.packed - (tile << shift) + (tile << (self.blank * self.tables.bitsPerCell))
+        newPuzzle.blank = target
+        newPuzzle.tables = self.tables
         return newPuzzle
 
+    def successors(self):
+        "Returns (move, state) pairs for every legal move, straight from the move tables"
+        return [(move, self.slide(target, shift)) for move, target, shift in self.tables.moves[self.blank]]
+
     # Utilities for comparison and display
     def __eq__(self, other):
         """
@@ -141,27 +189,38 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.packed == other.packed and self.tables is other.tables
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.packed)
+
+    def tilePositions(self):
+        """
+          Returns a list whose i-th entry is the cell holding tile i, with
+        cells numbered row by row from 0.  Used by pattern databases.
+
+        >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).tilePositions()
+        [1, 0, 2, 3, 4, 5, 6, 7, 8]
+        """
+        positions = [0] * self.tables.numCells
+        for cell, tile in enumerate(self.tables.unpack(self.packed)):
+            positions[tile] = cell
+        return positions
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
         lines = []
-        horizontalLine = ('-' * (13))
+        width = len(str(self.size * self.size - 1))
+        horizontalLine = ('-' * ((width + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -182,7 +241,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -193,10 +252,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
-        succ = []
-        for a in state.legalMoves():
-            succ.append((a, 1, state.result(a)))
-        return succ
+        return [(a, 1, successor) for a, successor in state.successors()]
 
     def getCostOfActions(self, actions):
         """
@@ -207,6 +263,14 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+    def encodeState(self, state):
+        "The packed puzzle as bytes, for search.ExternalBreadthFirstSearch"
+        tables = state.tables
+        return state.packed.to_bytes((tables.numCells * tables.bitsPerCell + 7) // 8, 'big')
+
+    def decodeState(self, code):
+        return EightPuzzleState(self.puzzle.tables.unpack(int.from_bytes(code, 'big')))
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -234,20 +298,49 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size: side length of the puzzle, 3 for the eight puzzle
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+def exploreStateSpace(puzzle):
+    """
+      Breadth-first search over every state reachable from puzzle, working
+    on packed integers only.  Returns the number of states in each BFS layer;
+    for the eight puzzle they add up to 181440.
+
+    Every move changes the parity of the blank's cell, so the successors of
+    a layer can only lie in the layer before it or the layer after it.  Only
+    those layers are kept for duplicate detection, which keeps memory to a
+    few MB instead of a set of the whole state space.
+    """
+    tables = puzzle.tables
+    bits, mask = tables.bitsPerCell, tables.mask
+    previous, layer = {}, {puzzle.packed: puzzle.blank}
+    layerSizes = []
+    while layer:
+        layerSizes.append(len(layer))
+        nextLayer = {}
+        for packed, blank in layer.items():
+            blankShift = blank * bits
+            for _, target, shift in tables.moves[blank]:
+                tile = (packed >> shift) & mask
+                successor = packed - (tile << shift) + (tile << blankShift)
+                if successor not in previous and successor not in nextLayer:
+                    nextLayer[successor] = target
+        previous, layer = layer, nextLayer
+    return layerSizes
+
 if __name__ == '__main__':
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
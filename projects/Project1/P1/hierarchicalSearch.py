@@ -0,0 +1,223 @@
+# hierarchicalSearch.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Hierarchical pathfinding (HPA*) for repeated point-to-point queries.
+
+The walls Grid is cut into square clusters.  Every open cell next to an open
+cell of another cluster is an entrance.  Preprocessing links the two cells of
+each crossing with an edge of cost 1 and every pair of entrances of a cluster
+with the length of the shortest path that stays inside the cluster.
+
+A query only searches inside the start and goal clusters, then runs A* on
+the small abstract graph of entrances, and paths are refined back into
+actions one cluster at a time.  By default every crossing is an entrance, so
+the abstract distance is the exact maze distance; with exact=False only a
+few crossings per cluster border are kept, which makes the abstract graph
+far smaller at the price of slightly longer paths.
+
+Preprocessing is cached per layout, see hierarchicalPathfinder().
+"""
+
+import collections
+import heapq
+
+from game import Actions
+from game import Directions
+
+
+class HierarchicalPathfinder:
+
+    def __init__(self, walls, clusterSize=8, exact=True):
+        self.walls = walls
+        self.clusterSize = clusterSize
+        # the neighbours of every open cell, with the action leading there
+        self.neighbours = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if walls[x][y]:
+                    continue
+                steps = []
+                for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not walls[nextx][nexty]:
+                        steps.append((action, (nextx, nexty)))
+                self.neighbours[(x, y)] = steps
+
+        # abstract graph: entrance -> list of (entrance, cost)
+        self.entrances = collections.defaultdict(list)
+        self.edges = collections.defaultdict(list)
+        for cell, neighbour in self.transitions(exact):
+            for a, b in [(cell, neighbour), (neighbour, cell)]:
+                self.edges[a].append((b, 1))
+                if a not in self.entrances[self.clusterOf(a)]:
+                    self.entrances[self.clusterOf(a)].append(a)
+        self.localTrees = {}
+        for cluster, entrances in self.entrances.items():
+            for entrance in entrances:
+                distances, _ = self.localSearch(entrance)
+                for other in entrances:
+                    if other != entrance and other in distances:
+                        self.edges[entrance].append((other, distances[other]))
+
+    def transitions(self, exact):
+        """
+        The (cell, neighbour) pairs that become abstract crossing edges.
+
+        With exact set every pair of adjacent open cells in different
+        clusters is used.  Otherwise each straight run of such pairs along a
+        cluster border gets a crossing in its middle, or one at each end if
+        the run is six cells or longer, as in the original HPA*; the abstract
+        graph is then much smaller but distances may be a little too long.
+        """
+        runs = collections.defaultdict(list)
+        for cell, steps in self.neighbours.items():
+            for _, neighbour in steps:
+                if neighbour > cell and self.clusterOf(neighbour) != self.clusterOf(cell):
+                    if exact:
+                        yield cell, neighbour
+                    else:
+                        vertical = cell[0] == neighbour[0]
+                        along = cell[0] if vertical else cell[1]
+                        key = (self.clusterOf(cell), self.clusterOf(neighbour), vertical)
+                        runs[key].append((along, cell, neighbour))
+        for crossings in runs.values():
+            crossings.sort()
+            run = [crossings[0]]
+            for crossing in crossings[1:] + [None]:
+                if crossing is not None and crossing[0] == run[-1][0] + 1:
+                    run.append(crossing)
+                    continue
+                chosen = [run[0], run[-1]] if len(run) >= 6 else [run[len(run) // 2]]
+                for _, cell, neighbour in chosen:
+                    yield cell, neighbour
+                run = [crossing]
+
+    def clusterOf(self, cell):
+        return (int(cell[0]) // self.clusterSize, int(cell[1]) // self.clusterSize)
+
+    def localSearch(self, source):
+        """
+        Breadth-first search from source that never leaves its cluster.
+        Returns (distances, parents); trees from entrances are cached since
+        path refinement needs them again.
+        """
+        if source in self.localTrees:
+            return self.localTrees[source]
+        cluster = self.clusterOf(source)
+        distances, parents = {source: 0}, {source: None}
+        frontier = collections.deque([source])
+        while frontier:
+            cell = frontier.popleft()
+            for action, neighbour in self.neighbours[cell]:
+                if neighbour not in distances and self.clusterOf(neighbour) == cluster:
+                    distances[neighbour] = distances[cell] + 1
+                    parents[neighbour] = (cell, action)
+                    frontier.append(neighbour)
+        if source in self.edges:
+            self.localTrees[source] = (distances, parents)
+        return distances, parents
+
+    def abstractSearch(self, start, goal):
+        """
+        Returns (cost, route) for the shortest path from start to goal, where
+        route is the list of cells at which the path changes abstract edge.
+        """
+        start, goal = tuple(map(int, start)), tuple(map(int, goal))
+        startDistances, _ = self.localSearch(start)
+        goalDistances, _ = self.localSearch(goal)
+        bestCost, bestRoute = float('inf'), None
+        if goal in startDistances:
+            bestCost, bestRoute = startDistances[goal], [start, goal]
+
+        # A* over entrances, seeded with the entrances of start's cluster; the
+        # Manhattan distance never exceeds an abstract edge, so it is consistent
+        gx, gy = goal
+        costs, previous, fringe = {}, {}, []
+        for entrance in self.entrances.get(self.clusterOf(start), []):
+            if entrance in startDistances:
+                costs[entrance] = startDistances[entrance]
+                previous[entrance] = start
+                estimate = abs(entrance[0] - gx) + abs(entrance[1] - gy)
+                heapq.heappush(fringe, (costs[entrance] + estimate, costs[entrance], entrance))
+        goalEntrances = set(entrance for entrance in self.entrances.get(self.clusterOf(goal), [])
+                            if entrance in goalDistances)
+        while fringe:
+            estimate, cost, node = heapq.heappop(fringe)
+            if estimate >= bestCost:
+                break
+            if cost > costs[node]:
+                continue
+            if node in goalEntrances and cost + goalDistances[node] < bestCost:
+                bestCost = cost + goalDistances[node]
+                route = [goal, node]
+                while route[-1] != start:
+                    route.append(previous[route[-1]])
+                bestRoute = route[::-1]
+            for neighbour, edgeCost in self.edges[node]:
+                if cost + edgeCost < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = cost + edgeCost
+                    previous[neighbour] = node
+                    estimate = abs(neighbour[0] - gx) + abs(neighbour[1] - gy)
+                    heapq.heappush(fringe, (cost + edgeCost + estimate, cost + edgeCost, neighbour))
+        return bestCost, bestRoute
+
+    def distance(self, start, goal):
+        """
+        The maze distance between two open cells, inf if unreachable.  It is
+        exact unless the pathfinder was built with exact=False.
+        """
+        return self.abstractSearch(start, goal)[0]
+
+    def path(self, start, goal):
+        "A shortest list of actions from start to goal, or None if there is none"
+        _, route = self.abstractSearch(start, goal)
+        if route is None:
+            return None
+        actions = []
+        for a, b in zip(route, route[1:]):
+            if self.clusterOf(a) != self.clusterOf(b):
+                actions.append(Actions.vectorToDirection((b[0] - a[0], b[1] - a[1])))
+                continue
+            _, parents = self.localSearch(a)
+            segment, cell = [], b
+            while cell != a:
+                cell, action = parents[cell]
+                segment.append(action)
+            actions += segment[::-1]
+        return actions
+
+
+_pathfinders = {}          # (walls, clusterSize, exact) -> HierarchicalPathfinder
+_pathfindersOfWalls = {}   # (id(walls), clusterSize, exact) -> (walls, HierarchicalPathfinder)
+
+def hierarchicalPathfinder(walls, clusterSize=8, exact=True):
+    """
+    The HierarchicalPathfinder of a layout, built on first use.  Every state
+    of a game shares the layout's walls Grid, so after the first call for a
+    Grid it is found by identity; only a new Grid is compared with the
+    layouts seen before.
+
+    searchAgents.mazeDistance uses the default exact mode, so its answers
+    are true maze distances.
+    """
+    entry = _pathfindersOfWalls.get((id(walls), clusterSize, exact))
+    if entry is not None and entry[0] is walls:
+        return entry[1]
+    key = (walls, clusterSize, exact)
+    if key not in _pathfinders:
+        _pathfinders[key] = HierarchicalPathfinder(walls, clusterSize, exact)
+    _pathfindersOfWalls[(id(walls), clusterSize, exact)] = (walls, _pathfinders[key])
+    return _pathfinders[key]
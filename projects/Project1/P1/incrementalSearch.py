@@ -0,0 +1,224 @@
+# incrementalSearch.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+D* Lite (Koenig and Likhachev) for position searches whose cell costs change
+while Pacman is moving.
+
+As in PositionSearchProblem, stepping into a cell costs costFn(cell).  The
+planner searches backwards from the goal, so g(cell) is the cost from cell to
+the goal, and it keeps g, rhs and its open list from one plan to the next.
+When Pacman moves only the key modifier km grows, and when the cost of a few
+cells changes only their neighbours are put back on the open list; the next
+computeShortestPath() call then repairs just the part of the search tree
+that the change affected.
+
+Run this file to compare repairing a plan as a ghost moves in front of Pacman
+with planning it again from scratch:
+
+> python incrementalSearch.py
+"""
+
+import heapq
+
+from game import Actions
+from game import Directions
+
+
+def manhattanDistance(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class DStarLite:
+    """
+    An incremental planner from a moving start to a fixed goal.
+
+      walls:     the walls Grid of the layout
+      costFn:    the cost of stepping into a cell, as in PositionSearchProblem
+      heuristic: heuristic(a, b) must never exceed the cost of getting from a
+                 to b; the default Manhattan distance assumes costs of at
+                 least 1, use lambda a, b: 0 for cheaper cells
+    """
+
+    def __init__(self, walls, start, goal, costFn=lambda cell: 1, heuristic=manhattanDistance):
+        self.walls = walls
+        self.start, self.goal = start, goal
+        self.costFn = costFn
+        self.heuristic = heuristic
+        self.costs = {}     # cells whose cost was changed by updateCosts()
+        self.g, self.rhs = {}, {goal: 0}
+        self.km = 0
+        self.fringe = []    # (key, cell) items, stale unless key == self.keys[cell]
+        self.keys = {}
+        self.expanded = 0
+        self.push(goal)
+
+    def cost(self, cell):
+        if cell in self.costs:
+            return self.costs[cell]
+        return self.costFn(cell)
+
+    def neighbours(self, cell):
+        "The (action, cell) pairs of the open cells next to cell"
+        x, y = cell
+        result = []
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+            if not self.walls[nextx][nexty]:
+                result.append((action, (nextx, nexty)))
+        return result
+
+    def calculateKey(self, cell):
+        best = min(self.g.get(cell, float('inf')), self.rhs.get(cell, float('inf')))
+        return (best + self.heuristic(self.start, cell) + self.km, best)
+
+    def push(self, cell):
+        key = self.calculateKey(cell)
+        self.keys[cell] = key
+        heapq.heappush(self.fringe, (key, cell))
+
+    def topKey(self):
+        "The smallest valid key on the open list, dropping stale items"
+        while self.fringe and self.keys.get(self.fringe[0][1]) != self.fringe[0][0]:
+            heapq.heappop(self.fringe)
+        return self.fringe[0][0] if self.fringe else (float('inf'), float('inf'))
+
+    def updateVertex(self, cell):
+        if cell != self.goal:
+            self.rhs[cell] = min([self.cost(neighbour) + self.g.get(neighbour, float('inf'))
+                                  for _, neighbour in self.neighbours(cell)] + [float('inf')])
+        self.keys.pop(cell, None)
+        if self.g.get(cell, float('inf')) != self.rhs.get(cell, float('inf')):
+            self.push(cell)
+
+    def computeShortestPath(self):
+        """
+        Processes the open list until the start is consistent.  Returns the
+        number of cells expanded by this call.
+        """
+        expanded = 0
+        while (self.topKey() < self.calculateKey(self.start) or
+               self.rhs.get(self.start, float('inf')) != self.g.get(self.start, float('inf'))):
+            oldKey, cell = heapq.heappop(self.fringe)
+            del self.keys[cell]
+            newKey = self.calculateKey(cell)
+            expanded += 1
+            if oldKey < newKey:
+                self.push(cell)
+            elif self.g.get(cell, float('inf')) > self.rhs[cell]:
+                self.g[cell] = self.rhs[cell]
+                for _, neighbour in self.neighbours(cell):
+                    self.updateVertex(neighbour)
+            else:
+                self.g[cell] = float('inf')
+                for _, neighbour in self.neighbours(cell) + [(None, cell)]:
+                    self.updateVertex(neighbour)
+            if not self.fringe and self.rhs.get(self.start, float('inf')) == float('inf'):
+                break
+        self.expanded += expanded
+        return expanded
+
+    def moveTo(self, cell):
+        "Tells the planner that Pacman now stands on cell"
+        self.km += self.heuristic(self.start, cell)
+        self.start = cell
+
+    def updateCosts(self, costs):
+        """
+        Sets the cost of stepping into each cell of the dictionary costs and
+        marks the cells whose best route may have changed.
+        """
+        for cell, cost in costs.items():
+            if cost == self.cost(cell):
+                continue
+            self.costs[cell] = cost
+            for _, neighbour in self.neighbours(cell):
+                self.updateVertex(neighbour)
+
+    def pathCost(self):
+        return self.g.get(self.start, float('inf'))
+
+    def path(self):
+        """
+        Follows the cheapest successors from the start to the goal and
+        returns the actions, or None if the goal cannot be reached.
+        """
+        if self.pathCost() == float('inf'):
+            return None
+        cell, actions = self.start, []
+        while cell != self.goal:
+            action, cell = min(self.neighbours(cell),
+                               key=lambda step: self.cost(step[1]) + self.g.get(step[1], float('inf')))
+            actions.append(action)
+        return actions
+
+
+def benchmark(layoutName, ghostEvery=10, ghostAhead=4, penalty=20, maxSteps=250):
+    """
+    Walks Pacman along its plan and, every ghostEvery steps, moves a ghost
+    onto the cell ghostAhead steps in front of it, making that cell and its
+    neighbours cost penalty.  Prints the cells expanded by D* Lite repairs
+    and by a fresh uniform cost search at each change.  The ghost can make
+    Pacman turn back and forth, so the walk stops after maxSteps.
+    """
+    import layout
+    import search
+    import searchAgents
+
+    class _State:
+        "Just enough of a GameState for PositionSearchProblem"
+        def __init__(self, walls, start): self.walls, self.start = walls, start
+        def getWalls(self): return self.walls
+        def getPacmanPosition(self): return self.start
+
+    theLayout = layout.getLayout(layoutName)
+    walls = theLayout.walls
+    start, goal = theLayout.agentPositions[0][1], theLayout.food.asList()[0]
+    planner = DStarLite(walls, start, goal)
+    penalised = []
+    initial = planner.computeShortestPath()
+    print('%s: initial plan cost %d, expanded %d' % (layoutName, planner.pathCost(), initial))
+    totals = [0, 0]
+    steps = 0
+    while planner.start != goal and steps < maxSteps:
+        path = planner.path()
+        if steps and steps % ghostEvery == 0 and len(path) > ghostAhead:
+            cell = planner.start
+            for action in path[:ghostAhead]:
+                dx, dy = Actions.directionToVector(action)
+                cell = (int(cell[0] + dx), int(cell[1] + dy))
+            changes = dict((old, 1) for old in penalised)
+            penalised = [cell] + [neighbour for _, neighbour in planner.neighbours(cell)]
+            changes.update((new, penalty) for new in penalised)
+            planner.updateCosts(changes)
+            repaired = planner.computeShortestPath()
+            problem = searchAgents.PositionSearchProblem(_State(walls, planner.start), planner.cost, goal,
+                                                         warn=False, visualize=False)
+            fresh = search.uniformCostSearch(problem)
+            assert problem.getCostOfActions(fresh) == planner.pathCost()
+            totals[0] += repaired
+            totals[1] += problem._expanded
+            print('  step %3d  ghost at %-9s cost %5d  repair expanded %4d  from scratch %4d' %
+                  (steps, cell, planner.pathCost(), repaired, problem._expanded))
+            path = planner.path()
+        dx, dy = Actions.directionToVector(path[0])
+        planner.moveTo((int(planner.start[0] + dx), int(planner.start[1] + dy)))
+        steps += 1
+    print('  total: repairs expanded %d, fresh searches %d' % tuple(totals))
+
+
+if __name__ == '__main__':
+    for layoutName in ['bigMaze', 'openMaze']:
+        benchmark(layoutName)
@@ -0,0 +1,244 @@
+# junctionGraph.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Corridor compression of Pacman layouts.
+
+Most open cells of a maze have exactly two open neighbours, so a search that
+steps one cell at a time spends most of its expansions walking down
+corridors where there is nothing to decide.  A JunctionGraph keeps only the
+junctions (three or more open neighbours) and dead ends (at most one) as
+nodes and contracts every corridor between two of them into a single
+weighted Corridor edge.
+
+Every open cell has a location (corridor, offset): its position along one
+corridor, counted in steps from the corridor's start.  Junctions sit at
+offset 0 or at the end of one of their corridors.  Successors and exact maze
+distances can be asked for any cell, not just for junctions.
+
+Run this file to see how much each layout shrinks:
+
+> python junctionGraph.py
+"""
+
+import heapq
+
+from game import Actions
+from game import Directions
+
+
+class Corridor:
+    """
+    A chain of cells from one node to another.  cells[0] is start and
+    cells[-1] is end; actions[i] moves from cells[i] to cells[i + 1].
+    """
+
+    def __init__(self, index, cells, actions):
+        self.index = index
+        self.cells = cells
+        self.actions = actions
+        self.start, self.end = cells[0], cells[-1]
+        self.length = len(actions)
+
+    def walk(self, fromOffset, toOffset):
+        "The actions that walk along this corridor between two offsets"
+        if toOffset >= fromOffset:
+            return tuple(self.actions[fromOffset:toOffset])
+        return tuple(Directions.REVERSE[action] for action in reversed(self.actions[toOffset:fromOffset]))
+
+    def __repr__(self):
+        return 'Corridor(%s -> %s, %d)' % (self.start, self.end, self.length)
+
+
+class JunctionGraph:
+    """
+    The corridor-compressed graph of a walls Grid.
+
+      nodes:     the junction and dead-end cells
+      corridors: the list of Corridor edges
+      location:  open cell -> (corridor, offset), corridor None for a cell
+                 that is not on any corridor (an isolated cell)
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+        neighbours = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if walls[x][y]:
+                    continue
+                steps = []
+                for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not walls[nextx][nexty]:
+                        steps.append((action, (nextx, nexty)))
+                neighbours[(x, y)] = steps
+        self.numCells = len(neighbours)
+
+        self.nodes = set(cell for cell, steps in neighbours.items() if len(steps) != 2)
+        self.corridors = []
+        self.location = {}
+        self.incident = {}  # node -> list of (corridor, offset of the node on it)
+        walked = set()      # (node, action) pairs that already start a corridor
+        for cell in sorted(self.nodes):
+            self.addCorridorsFrom(cell, neighbours, walked)
+        # cycles without any junction get one arbitrary cell as their node
+        for cell in sorted(neighbours):
+            if cell not in self.location:
+                self.nodes.add(cell)
+                self.addCorridorsFrom(cell, neighbours, walked)
+
+    def addCorridorsFrom(self, node, neighbours, walked):
+        self.incident.setdefault(node, [])
+        if node not in self.location:
+            self.location[node] = (None, 0)
+        for action, cell in neighbours[node]:
+            if (node, action) in walked:
+                continue
+            cells, actions = [node, cell], [action]
+            while cells[-1] not in self.nodes:
+                previous = cells[-2]
+                action, cell = [step for step in neighbours[cells[-1]] if step[1] != previous][0]
+                cells.append(cell)
+                actions.append(action)
+            corridor = Corridor(len(self.corridors), cells, actions)
+            self.corridors.append(corridor)
+            walked.add((node, actions[0]))
+            walked.add((corridor.end, Directions.REVERSE[actions[-1]]))
+            self.incident.setdefault(corridor.end, [])
+            self.incident[node].append((corridor, 0))
+            self.incident[corridor.end].append((corridor, corridor.length))
+            for offset, cell in enumerate(cells):
+                if cell not in self.location or self.location[cell][0] is None:
+                    self.location[cell] = (corridor, offset)
+
+    def isNode(self, cell):
+        return cell in self.nodes
+
+    def exits(self, cell):
+        """
+        The (node, distance, actions) ways to leave a cell for the nearest
+        node in each direction; just the cell itself if it is a node.
+        """
+        if cell in self.nodes:
+            return [(cell, 0, ())]
+        corridor, offset = self.location[cell]
+        return [(corridor.start, offset, corridor.walk(offset, 0)),
+                (corridor.end, corridor.length - offset, corridor.walk(offset, corridor.length))]
+
+    def successors(self, cell, targets=()):
+        """
+        Returns (actions, cost, nextCell) triples: every corridor walk from
+        cell to the next node.  A walk that passes one of the target cells
+        also yields the shorter walk that stops on it, so goals in the middle
+        of a corridor are reached.
+        """
+        if cell in self.nodes:
+            walks = [(corridor, offset, corridor.length if offset == 0 else 0)
+                     for corridor, offset in self.incident[cell]]
+        else:
+            corridor, offset = self.location[cell]
+            walks = [(corridor, offset, 0), (corridor, offset, corridor.length)]
+        result = []
+        for corridor, fromOffset, toOffset in walks:
+            for target in targets:
+                if target in self.nodes or target == cell or target not in self.location:
+                    continue
+                targetCorridor, targetOffset = self.location[target]
+                if targetCorridor is corridor and min(fromOffset, toOffset) < targetOffset < max(fromOffset, toOffset):
+                    result.append((corridor.walk(fromOffset, targetOffset),
+                                   abs(targetOffset - fromOffset), target))
+            result.append((corridor.walk(fromOffset, toOffset), abs(toOffset - fromOffset),
+                           corridor.cells[toOffset]))
+        return result
+
+    def shortestPath(self, start, goal):
+        """
+        Returns (cost, actions) for a shortest path between two open cells,
+        (inf, None) if goal cannot be reached.  Dijkstra runs on the nodes
+        only, entered and left through the corridors of start and goal.
+        """
+        start, goal = tuple(map(int, start)), tuple(map(int, goal))
+        if start == goal:
+            return 0, []
+        bestCost, bestActions = float('inf'), None
+        startCorridor, startOffset = self.location[start]
+        goalCorridor, goalOffset = self.location[goal]
+        if startCorridor is not None and startCorridor is goalCorridor and start not in self.nodes \
+                and goal not in self.nodes:
+            bestCost = abs(goalOffset - startOffset)
+            bestActions = list(startCorridor.walk(startOffset, goalOffset))
+        # the last leg from each node to the goal
+        arrivals = {}
+        for node, cost, actions in self.exits(goal):
+            reverse = tuple(Directions.REVERSE[action] for action in reversed(actions))
+            if cost < arrivals.get(node, (float('inf'),))[0]:
+                arrivals[node] = (cost, reverse)
+
+        costs, previous, fringe = {}, {}, []
+        for node, cost, actions in self.exits(start):
+            if cost < costs.get(node, float('inf')):
+                costs[node] = cost
+                previous[node] = (None, actions)
+                heapq.heappush(fringe, (cost, node))
+        while fringe:
+            cost, node = heapq.heappop(fringe)
+            if cost >= bestCost:
+                break
+            if cost > costs[node]:
+                continue
+            if node in arrivals and cost + arrivals[node][0] < bestCost:
+                bestCost = cost + arrivals[node][0]
+                legs, cell = [arrivals[node][1]], node
+                while cell is not None:
+                    cell, actions = previous[cell]
+                    legs.append(actions)
+                bestActions = [action for leg in reversed(legs) for action in leg]
+            for actions, length, neighbour in self.successors(node):
+                if cost + length < costs.get(neighbour, float('inf')):
+                    costs[neighbour] = cost + length
+                    previous[neighbour] = (node, actions)
+                    heapq.heappush(fringe, (cost + length, neighbour))
+        return bestCost, bestActions
+
+    def distance(self, start, goal):
+        "The exact maze distance between two open cells, inf if unreachable"
+        return self.shortestPath(start, goal)[0]
+
+    def path(self, start, goal):
+        "A shortest list of actions from start to goal, or None if there is none"
+        return self.shortestPath(start, goal)[1]
+
+
+_junctionGraphs = {}
+
+def junctionGraph(walls):
+    "The JunctionGraph of a layout, built on first use"
+    key = str(walls)
+    if key not in _junctionGraphs:
+        _junctionGraphs[key] = JunctionGraph(walls)
+    return _junctionGraphs[key]
+
+
+if __name__ == '__main__':
+    import os
+
+    import layout
+
+    print('%-20s %8s %8s %10s %8s' % ('layout', 'cells', 'nodes', 'corridors', 'ratio'))
+    for name in sorted(name[:-4] for name in os.listdir('layouts') if name.endswith('.lay')):
+        graph = JunctionGraph(layout.getLayout(name).walls)
+        print('%-20s %8d %8d %10d %7.1fx' % (name, graph.numCells, len(graph.nodes), len(graph.corridors),
+                                             graph.numCells / float(max(1, len(graph.nodes)))))
@@ -0,0 +1,204 @@
+# landmarks.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+ALT (A*, landmarks and the triangle inequality) preprocessing for mazes.
+
+A handful of landmark cells is chosen and the maze distance from each
+landmark to every cell is stored in one int32 array per landmark.  For any
+landmark L the triangle inequality gives
+
+  dist(v, goal) >= |dist(L, goal) - dist(L, v)|
+
+so the largest of these differences is an admissible, consistent heuristic
+for unit-cost position searches.  Memory is O(k * V) for k landmarks instead
+of the O(V^2) of an all-pairs table.
+"""
+
+import array
+import collections
+import random
+
+from game import Actions
+from game import Directions
+
+UNREACHABLE = -1
+
+
+class MazeGraph:
+    """
+    The open cells of a walls Grid, numbered x * height + y, with their
+    neighbours.  Distances are computed with breadth-first search into int32
+    arrays indexed by cell number.
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+        self.width, self.height = walls.width, walls.height
+        self.numCells = self.width * self.height
+        self.neighbours = [()] * self.numCells
+        self.openCells = []
+        for x in range(self.width):
+            for y in range(self.height):
+                if walls[x][y]:
+                    continue
+                cells = []
+                for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not walls[nextx][nexty]:
+                        cells.append(nextx * self.height + nexty)
+                self.neighbours[x * self.height + y] = tuple(cells)
+                self.openCells.append(x * self.height + y)
+
+    def index(self, position):
+        x, y = position
+        return int(x) * self.height + int(y)
+
+    def position(self, index):
+        return divmod(index, self.height)
+
+    def distancesFrom(self, source, parents=None):
+        """
+        Returns an int32 array of BFS distances from cell number source,
+        UNREACHABLE for walls and cut-off cells.  If parents is a list, the
+        BFS parent of every reached cell is written into it.
+        """
+        distances = array.array('i', [UNREACHABLE]) * self.numCells
+        distances[source] = 0
+        frontier = collections.deque([source])
+        neighbours = self.neighbours
+        while frontier:
+            cell = frontier.popleft()
+            nextDistance = distances[cell] + 1
+            for neighbour in neighbours[cell]:
+                if distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = nextDistance
+                    if parents is not None:
+                        parents[neighbour] = cell
+                    frontier.append(neighbour)
+        return distances
+
+
+class Landmarks:
+    """
+    Landmark distance tables for one maze.
+
+      walls:    the walls Grid of the layout
+      k:        number of landmarks
+      strategy: 'farthest' picks each landmark as far as possible from the
+                ones already chosen; 'avoid' grows landmarks in the parts of
+                the maze the current landmarks estimate worst
+    """
+
+    def __init__(self, walls, k=8, strategy='farthest', seed=0):
+        self.graph = MazeGraph(walls)
+        self.landmarks = []
+        self.tables = []
+        if not self.graph.openCells:
+            return
+        self.random = random.Random(seed)
+        choose = {'farthest': self.chooseFarthest, 'avoid': self.chooseAvoid}[strategy]
+        for _ in range(min(k, len(self.graph.openCells))):
+            landmark = choose()
+            if landmark is None or landmark in self.landmarks:
+                break
+            self.landmarks.append(landmark)
+            self.tables.append(self.graph.distancesFrom(landmark))
+
+    def chooseFarthest(self):
+        "The open cell that maximises its distance to the nearest landmark"
+        if not self.tables:
+            # start from the cell farthest from an arbitrary one
+            first = self.graph.distancesFrom(self.graph.openCells[0])
+            return max(self.graph.openCells, key=lambda cell: first[cell])
+        best, bestDistance = None, -1
+        for cell in self.graph.openCells:
+            nearest = min(table[cell] for table in self.tables)
+            if nearest > bestDistance:
+                best, bestDistance = cell, nearest
+        return best
+
+    def chooseAvoid(self):
+        """
+        The 'avoid' rule of Goldberg and Harrelson: from a random root, weigh
+        every cell by how much the current landmarks underestimate its
+        distance to the root, then walk down the BFS tree towards the heaviest
+        subtree that holds no landmark and take the leaf reached.
+        """
+        if not self.tables:
+            return self.chooseFarthest()
+        graph = self.graph
+        root = self.random.choice(graph.openCells)
+        parents = [None] * graph.numCells
+        distances = graph.distancesFrom(root, parents)
+        reached = [cell for cell in graph.openCells if distances[cell] != UNREACHABLE]
+        reached.sort(key=lambda cell: distances[cell])
+        landmarkSet = set(self.landmarks)
+        size = [0] * graph.numCells
+        blocked = [False] * graph.numCells
+        children = collections.defaultdict(list)
+        for cell in reversed(reached):
+            if cell in landmarkSet:
+                blocked[cell] = True
+            if blocked[cell]:
+                size[cell] = 0
+            else:
+                size[cell] += distances[cell] - self.estimate(root, cell)
+            parent = parents[cell]
+            if parent is not None:
+                children[parent].append(cell)
+                if blocked[cell]:
+                    blocked[parent] = True
+                else:
+                    size[parent] += size[cell]
+        cell = max(reached, key=lambda c: size[c])
+        while children[cell]:
+            child = max(children[cell], key=lambda c: size[c])
+            if size[child] <= 0:
+                break
+            cell = child
+        return cell
+
+    def estimate(self, source, target):
+        "Lower bound on the maze distance between two cell numbers"
+        best = 0
+        for table in self.tables:
+            a, b = table[source], table[target]
+            if a != UNREACHABLE and b != UNREACHABLE:
+                difference = a - b if a > b else b - a
+                if difference > best:
+                    best = difference
+        return best
+
+    def heuristicTo(self, goal):
+        """
+        Returns a function position -> lower bound on its maze distance to
+        goal, with the goal's landmark distances looked up once.
+        """
+        graph = self.graph
+        goalIndex = graph.index(goal)
+        pairs = [(table, table[goalIndex]) for table in self.tables if table[goalIndex] != UNREACHABLE]
+        height = graph.height
+        def h(position):
+            index = int(position[0]) * height + int(position[1])
+            best = 0
+            for table, toGoal in pairs:
+                toCell = table[index]
+                if toCell != UNREACHABLE:
+                    difference = toGoal - toCell if toGoal > toCell else toCell - toGoal
+                    if difference > best:
+                        best = difference
+            return best
+        return h
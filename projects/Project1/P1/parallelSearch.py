@@ -0,0 +1,310 @@
+# parallelSearch.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Hash-distributed A* (HDA*) over several worker processes.
+
+Every search state is owned by exactly one worker, chosen by hashing the
+state.  A worker keeps its own open and closed lists, expands the states it
+owns and forwards the successors it does not own to their owners in batches.
+
+The workers run in synchronous rounds driven by the calling process:
+
+  1. read the batches the other workers sent during the previous round
+  2. expand every local node whose f-value is no more than the smallest
+     f-value in play across all workers
+  3. send one batch to every other worker
+  4. report the smallest f-value still in play, how many nodes were sent
+     and received, and any goal found
+
+Expanding only the globally smallest f-values keeps the workers in the
+order of a serial A*, so with a consistent heuristic no state is expanded
+twice.  The cost of the best goal found so far is kept in shared memory and
+every worker prunes the nodes above it as soon as it changes.
+
+A forwarded node carries its parent as a (worker, id) pair rather than its
+whole path; the path is traced back through the owners once the search is
+over.  The search stops when the best goal found is cheaper than every
+f-value in play, after a last round in which the workers only read their
+batches: every node sent must then have been received, so none can have
+been missed in transit.  With an admissible heuristic the returned path is
+optimal.
+
+Ties are broken the same way whatever the number of workers or the order
+in which batches arrive.  Every node with f no more than the optimal cost
+is expanded, a state reached at the same cost from several parents keeps
+the one with the smallest (hash of the parent, action), and of several
+optimal goals the one with the smallest hash is returned.  So with a
+consistent heuristic every run and every worker count returns the same
+path.  It has the cost of the path search.aStarSearch returns, but when
+there are several optimal paths it need not be the same one: the serial
+search breaks ties by the order states were pushed, which has no
+counterpart across processes.
+
+Run this file to compare the serial and the parallel search for a few
+worker counts:
+
+> python parallelSearch.py
+"""
+
+import multiprocessing
+import os
+import time
+
+import search
+import util
+
+
+def ownerOf(state, numWorkers):
+    "Index of the worker responsible for a state"
+    return hash(state) % numWorkers
+
+
+def _hdaWorker(index, problem, heuristic, inboxes, commands, reports, incumbent, incumbentLock):
+    """
+    Body of one HDA* worker process.  The open list holds (g, state) items
+    keyed on f, and the closed list maps each owned state to the cheapest
+    cost it was reached with.  Owned states are numbered in the order they
+    are first reached; parents[id] is the (worker, id, action, key) they
+    are best reached from, None for the start, where key is the hash of the
+    parent state.  Goals are recognised when they are reached rather than
+    when they are popped, so that the incumbent prunes the layers above
+    them at once.
+    """
+    numWorkers = len(inboxes)
+    # the inboxes are drained before the workers stop; don't block exit on them
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    openList = util.PriorityQueue()
+    closed, ids, parents = {}, {}, []
+    goals, early = [], []
+    expanded = sent = received = rounds = 0
+
+    def reach(state, g, f, parent):
+        if state not in ids:
+            ids[state] = len(parents)
+            parents.append(parent)
+        elif g == closed[state]:
+            # the same cost again: keep the smaller parent, but don't reopen
+            if (parent[3], parent[2]) < (parents[ids[state]][3], parents[ids[state]][2]):
+                parents[ids[state]] = parent
+            return
+        else:
+            parents[ids[state]] = parent
+        closed[state] = g
+        if problem.isGoalState(state):
+            with incumbentLock:
+                if g < incumbent.value:
+                    incumbent.value = g
+            goals.append((g, hash(state), index, ids[state]))
+        else:
+            openList.push((g, state), f)
+
+    start = problem.getStartState()
+    if ownerOf(start, numWorkers) == index:
+        reach(start, 0, heuristic(start, problem), None)
+
+    while True:
+        command = commands[index].get()
+        if command is None:
+            break
+        if command[0] == 'trace':
+            # follow the parents of a node while they are ours
+            actions, parent = [], parents[command[1]]
+            while parent is not None and parent[0] == index:
+                actions.append(parent[2])
+                parent = parents[parent[1]]
+            if parent is not None:
+                actions.append(parent[2])
+            reports.put((actions, parent))
+            continue
+
+        # 1. nodes forwarded to us during the previous round; a faster worker
+        # may already have sent its batch for this one, which is kept for later
+        roundStart = time.process_time()
+        rounds += 1
+        if rounds > 1:
+            batches = [batch for batch in early if batch[0] == rounds - 1]
+            early = [batch for batch in early if batch[0] != rounds - 1]
+            while len(batches) < numWorkers - 1:
+                batch = inboxes[index].get()
+                (batches if batch[0] == rounds - 1 else early).append(batch)
+            for _, nodes in batches:
+                for f, g, state, parent in nodes:
+                    received += 1
+                    if g <= closed.get(state, float('inf')):
+                        reach(state, g, f, parent)
+
+        # 2. expand the local nodes on the global f-bound
+        outgoing = [[] for _ in range(numWorkers)]
+        sentBound = float('inf')
+        bound = command[1] if command[0] == 'round' else -float('inf')
+        while not openList.isEmpty() and openList.peek()[0] <= bound:
+            f, (g, state) = openList.peek()
+            openList.pop()
+            if g > closed.get(state, float('inf')) or f > incumbent.value:
+                continue
+            expanded += 1
+            parentId, parentKey = ids[state], hash(state)
+            for action, stepCost, successor in problem.getSuccessors(state):
+                nextCost = g + stepCost
+                nextF = nextCost + heuristic(successor, problem)
+                if nextF > incumbent.value:
+                    continue
+                owner = ownerOf(successor, numWorkers)
+                if owner == index:
+                    if nextCost <= closed.get(successor, float('inf')):
+                        reach(successor, nextCost, nextF, (index, parentId, action, parentKey))
+                else:
+                    outgoing[owner].append((nextF, nextCost, successor, (index, parentId, action, parentKey)))
+                    sentBound = min(sentBound, nextF)
+
+        # 3. one batch, possibly empty, to every other worker
+        for owner in range(numWorkers):
+            if owner != index:
+                inboxes[owner].put((rounds, outgoing[owner]))
+                sent += len(outgoing[owner])
+
+        # 4. report the local lower bound and the message counts
+        localBound = openList.peek()[0] if not openList.isEmpty() else float('inf')
+        newGoal = min(goals) if goals else None
+        del goals[:]
+        reports.put((index, min(localBound, sentBound), newGoal, expanded, sent, received,
+                     time.process_time() - roundStart))
+
+
+def hdaStarSearch(problem, heuristic=search.nullHeuristic, numWorkers=None):
+    """
+    Runs hash-distributed A* with numWorkers processes and returns an optimal
+    list of actions.
+
+    The path does not depend on numWorkers, and has the same cost as the one
+    found by search.aStarSearch (see the module documentation for ties).
+    problem._criticalPath is set to the CPU seconds of the busiest worker
+    in each round, summed over the rounds: the time the search would take
+    with a core per worker.
+    Workers are forked so that problems holding lambdas or game states need
+    not be picklable; where fork is unavailable the serial search is used
+    instead.
+    """
+    if numWorkers is None:
+        numWorkers = min(4, os.cpu_count() or 1)
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return search.aStarSearch(problem, heuristic)
+    context = multiprocessing.get_context('fork')
+
+    inboxes = [context.Queue() for _ in range(numWorkers)]
+    commands = [context.Queue() for _ in range(numWorkers)]
+    reports = context.Queue()
+    incumbent = context.RawValue('d', float('inf'))
+    incumbentLock = context.Lock()
+    workers = [context.Process(target=_hdaWorker,
+                               args=(i, problem, heuristic, inboxes, commands, reports, incumbent, incumbentLock))
+               for i in range(numWorkers)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    bestGoal = None
+    expanded = [0] * numWorkers
+    start = problem.getStartState()
+    lowerBound = heuristic(start, problem)
+    draining = False
+    criticalPath = 0.0
+    try:
+        while True:
+            for i in range(numWorkers):
+                commands[i].put(('drain',) if draining else ('round', lowerBound))
+            lowerBound, sent, received, busiest = float('inf'), 0, 0, 0.0
+            for _ in range(numWorkers):
+                index, bound, goal, count, workerSent, workerReceived, seconds = reports.get()
+                busiest = max(busiest, seconds)
+                lowerBound = min(lowerBound, bound)
+                expanded[index] = count
+                sent += workerSent
+                received += workerReceived
+                if goal is not None and (bestGoal is None or goal[:2] < bestGoal[:2]):
+                    bestGoal = goal
+            criticalPath += busiest
+            bestCost = bestGoal[0] if bestGoal is not None else float('inf')
+            if lowerBound > bestCost or lowerBound == float('inf'):
+                if draining and sent == received:
+                    break
+                # one more round to read the last batches before stopping
+                draining = True
+            else:
+                draining = False
+        path = None
+        if bestGoal is not None:
+            path, parent = [], (bestGoal[2], bestGoal[3])
+            while parent is not None:
+                commands[parent[0]].put(('trace', parent[1]))
+                actions, parent = reports.get()
+                path.extend(actions)
+            path.reverse()
+    finally:
+        for i in range(numWorkers):
+            commands[i].put(None)
+        for worker in workers:
+            worker.join()
+
+    if '_expanded' in dir(problem):
+        problem._expanded += sum(expanded)
+    problem._criticalPath = criticalPath
+    if path is None:
+        util.raiseNotDefined()
+    return path
+
+
+def benchmark(name, makeProblem, heuristic, workerCounts=(1, 2, 4)):
+    """
+    Solves a fresh problem from makeProblem() serially and with each worker
+    count, printing the path cost, the wall-clock and critical path times
+    and the speedup of the critical path over the serial CPU time.  On a
+    machine with fewer cores than workers only the critical path shows the
+    speedup the workers would give.
+    """
+    start = time.process_time()
+    serialPath = search.aStarSearch(makeProblem(), heuristic)
+    serialTime = time.process_time() - start
+    print('%-12s serial     cost %4d  cpu %7.2fs' % (name, len(serialPath), serialTime))
+    firstPath = None
+    for numWorkers in workerCounts:
+        problem = makeProblem()
+        start = time.time()
+        path = hdaStarSearch(problem, heuristic, numWorkers)
+        elapsed = time.time() - start
+        firstPath = firstPath or path
+        print('%-12s %d worker%-2s cost %4d  wall %7.2fs  critical path %7.2fs  speedup %5.2fx  '
+              'same path for every worker count: %s' %
+              (name, numWorkers, ('', 's')[numWorkers > 1], len(path), elapsed, problem._criticalPath,
+               serialTime / max(problem._criticalPath, 1e-9), path == firstPath))
+
+
+if __name__ == '__main__':
+    import layout
+    import pacman
+    import searchAgents
+    import eightpuzzle
+
+    def foodProblem(layoutName):
+        state = pacman.GameState()
+        state.initialize(layout.getLayout(layoutName), 0)
+        return lambda: searchAgents.FoodSearchProblem(state)
+
+    eightpuzzle.random.seed(0)
+    puzzle = eightpuzzle.createRandomEightPuzzle(40)
+    benchmark('eightpuzzle', lambda: eightpuzzle.EightPuzzleSearchProblem(puzzle), search.nullHeuristic)
+    for layoutName in ['testSearch', 'tinySearch']:
+        benchmark(layoutName, foodProblem(layoutName), searchAgents.foodHeuristic)
@@ -0,0 +1,216 @@
+# patternDatabase.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Disjoint pattern databases for the sliding-tile puzzles in eightpuzzle.py.
+
+A pattern is a set of tiles.  Its database stores, for every placement of
+those tiles, the number of moves of pattern tiles needed to bring them home
+when all other tiles are treated as interchangeable blanks.  Since every move
+shifts exactly one tile, the values of databases over disjoint patterns can be
+added and still never overestimate the true solution length.
+
+Databases are built by a retrograde breadth-first search from the goal
+placement, stored as one byte per entry and saved to disk.  Loading a saved
+database memory-maps the file, so only the entries a search touches are read.
+
+Run this file to compare uninformed BFS with A* and the pattern database
+heuristic on random puzzles of increasing scramble depth:
+
+> python patternDatabase.py
+"""
+
+import mmap
+import os
+import time
+
+import eightpuzzle
+import search
+import util
+
+# The disjoint patterns used by default for each puzzle size
+DEFAULT_PATTERNS = {3: [(1, 2, 3, 4), (5, 6, 7, 8)],
+                    4: [(1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15)]}
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdbs')
+
+UNKNOWN = 255
+
+
+class PatternDatabase:
+    """
+    The distances of one pattern on a size x size puzzle.
+
+    The placement of the pattern tiles is indexed as a number in base
+    size**2, with the cell of the i-th pattern tile as the i-th digit.  This
+    wastes the entries in which two tiles share a cell but makes a lookup a
+    handful of multiplications.
+    """
+
+    def __init__(self, size, tiles, table):
+        self.size = size
+        self.tiles = tuple(tiles)
+        self.table = table
+        numCells = size * size
+        self.weights = [numCells ** i for i in range(len(self.tiles))]
+
+    def index(self, cells):
+        "Table index of the placement in which tile self.tiles[i] is on cells[i]"
+        return sum(cell * weight for cell, weight in zip(cells, self.weights))
+
+    def lookup(self, positions):
+        "positions[t] is the cell of tile t, as returned by tilePositions()"
+        return self.table[self.index([positions[tile] for tile in self.tiles])]
+
+    @staticmethod
+    def build(size, tiles):
+        """
+        Runs the retrograde breadth-first search from the goal placement and
+        returns the finished database.
+        """
+        numCells = size * size
+        neighbours = [[] for _ in range(numCells)]
+        for cell in range(numCells):
+            row, col = divmod(cell, size)
+            if row > 0: neighbours[cell].append(cell - size)
+            if row < size - 1: neighbours[cell].append(cell + size)
+            if col > 0: neighbours[cell].append(cell - 1)
+            if col < size - 1: neighbours[cell].append(cell + 1)
+
+        database = PatternDatabase(size, tiles, bytearray([UNKNOWN]) * (numCells ** len(tiles)))
+        table, weights = database.table, database.weights
+        goal = tuple(tiles)  # tile t starts on cell t
+        table[database.index(goal)] = 0
+        layer, distance = [goal], 0
+        while layer:
+            distance += 1
+            nextLayer = []
+            for cells in layer:
+                occupied = set(cells)
+                base = database.index(cells)
+                for i, cell in enumerate(cells):
+                    for neighbour in neighbours[cell]:
+                        if neighbour in occupied:
+                            continue
+                        index = base + (neighbour - cell) * weights[i]
+                        if table[index] == UNKNOWN:
+                            table[index] = distance
+                            nextLayer.append(cells[:i] + (neighbour,) + cells[i + 1:])
+            layer = nextLayer
+        return database
+
+    def filename(self, directory=DEFAULT_DIRECTORY):
+        return os.path.join(directory, 'pdb-%dx%d-%s.bin' % (self.size, self.size,
+                                                            '-'.join(str(t) for t in self.tiles)))
+
+    def save(self, directory=DEFAULT_DIRECTORY):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.filename(directory), 'wb') as f:
+            f.write(self.table)
+
+    @staticmethod
+    def load(size, tiles, directory=DEFAULT_DIRECTORY):
+        """
+        Memory-maps a saved database, or returns None if there is no file for
+        this pattern.
+        """
+        database = PatternDatabase(size, tiles, None)
+        path = database.filename(directory)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            database.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return database
+
+
+def loadPatternDatabases(size, patterns=None, directory=DEFAULT_DIRECTORY):
+    """
+    Returns the databases of the given disjoint patterns (by default those in
+    DEFAULT_PATTERNS), building and saving the ones that are not on disk yet.
+    """
+    if patterns is None:
+        patterns = DEFAULT_PATTERNS[size]
+    databases = []
+    for tiles in patterns:
+        database = PatternDatabase.load(size, tiles, directory)
+        if database is None:
+            database = PatternDatabase.build(size, tiles)
+            database.save(directory)
+        databases.append(database)
+    return databases
+
+
+class PatternDatabaseHeuristic:
+    """
+    The additive pattern database heuristic.  Instances are called like any
+    other heuristic:
+
+      heuristic = PatternDatabaseHeuristic(4)
+      search.aStarSearch(EightPuzzleSearchProblem(puzzle), heuristic)
+    """
+
+    def __init__(self, size=3, patterns=None, directory=DEFAULT_DIRECTORY):
+        self.databases = loadPatternDatabases(size, patterns, directory)
+
+    def __call__(self, state, problem=None):
+        positions = state.tilePositions()
+        return sum(database.lookup(positions) for database in self.databases)
+
+
+_defaultHeuristics = {}
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+    The additive pattern database heuristic with the default patterns for the
+    size of the given puzzle.  Databases are loaded on first use.
+    """
+    if state.size not in _defaultHeuristics:
+        _defaultHeuristics[state.size] = PatternDatabaseHeuristic(state.size)
+    return _defaultHeuristics[state.size](state, problem)
+
+
+def benchmark(size, depths, heuristic, runBFS, trials=3):
+    """
+    Solves random puzzles scrambled by each number of moves in depths and
+    prints the average path length, nodes expanded and time.
+    """
+    for depth in depths:
+        results = util.Counter()
+        for trial in range(trials):
+            eightpuzzle.random.seed(trial)
+            puzzle = eightpuzzle.createRandomEightPuzzle(depth, size)
+            searches = [('A*+PDB', lambda p, stats: search.aStarSearch(p, heuristic, stats=stats))]
+            if runBFS:
+                searches.append(('BFS', lambda p, stats: search.breadthFirstSearch(p, stats=stats)))
+            for name, run in searches:
+                stats = search.SearchStatistics(cellOf=lambda state: None)
+                start = time.time()
+                path = run(eightpuzzle.EightPuzzleSearchProblem(puzzle), stats)
+                results[name, 'time'] += time.time() - start
+                results[name, 'expanded'] += stats.expanded
+                results[name, 'length'] += len(path)
+        for name in ['BFS', 'A*+PDB']:
+            if (name, 'length') in results:
+                print('%dx%d depth %3d  %-7s moves %5.1f  expanded %9.1f  %7.3fs' %
+                      (size, size, depth, name, results[name, 'length'] / trials,
+                       results[name, 'expanded'] / trials, results[name, 'time'] / trials))
+
+
+if __name__ == '__main__':
+    for size, depths, runBFS in [(3, [10, 20, 40, 80], True), (4, [10, 20, 40, 60], False)]:
+        start = time.time()
+        heuristic = PatternDatabaseHeuristic(size)
+        print('%dx%d pattern databases ready in %.1fs' % (size, size, time.time() - start))
+        benchmark(size, depths, heuristic, runBFS)
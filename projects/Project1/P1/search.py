@@ -17,7 +17,17 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import collections
+import heapq
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
 import util
+from game import Directions
 
 
 class SearchProblem:
@@ -64,6 +74,247 @@ class SearchProblem:
         util.raiseNotDefined()
 
 
+def cellOfState(state):
+    """
+    Returns the (x, y) grid cell of a search state, or None if it has none.
+    Works for plain positions and for states that start with a position, such
+    as those of CornersProblem and FoodSearchProblem.
+    """
+    if isinstance(state, tuple) and state:
+        if len(state) == 2 and all(isinstance(v, int) for v in state):
+            return state
+        return cellOfState(state[0])
+    return None
+
+
+class SearchStatistics:
+    """
+    Collects statistics about a single search.  Pass an instance to a search
+    function as its stats argument:
+
+      stats = SearchStatistics()
+      path = aStarSearch(problem, manhattanHeuristic, stats=stats)
+      print(stats)
+      stats.save('stats.json')
+
+    The following are recorded:
+      expanded          nodes expanded (getSuccessors calls)
+      generated         successors returned by getSuccessors
+      duplicatesPruned  popped nodes skipped because they were already closed
+      peakFringe        largest fringe size seen
+      successorTime     seconds spent in getSuccessors
+      heuristicTime     seconds spent in the heuristic
+      heuristicCalls    number of heuristic evaluations
+      cellExpansions    expansions per (x, y) cell, as a util.Counter
+
+    cellOf maps a state to its grid cell (see cellOfState); states without a
+    cell are left out of cellExpansions.
+    """
+
+    def __init__(self, cellOf=cellOfState):
+        self.cellOf = cellOf
+        self.reset()
+
+    def reset(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicatesPruned = 0
+        self.peakFringe = 0
+        self.successorTime = 0.0
+        self.heuristicTime = 0.0
+        self.heuristicCalls = 0
+        self.cellExpansions = util.Counter()
+
+    def instrument(self, problem, heuristic=None):
+        """
+        Returns a problem and heuristic that behave like the given ones but
+        record their calls in these statistics.
+        """
+        return InstrumentedProblem(problem, self), self.timeHeuristic(heuristic, problem)
+
+    def timeHeuristic(self, heuristic, problem):
+        if heuristic is None:
+            return None
+        def timedHeuristic(state, _):
+            # the heuristic always sees the real problem, so attributes it sets stick
+            start = time.perf_counter()
+            value = heuristic(state, problem)
+            self.heuristicTime += time.perf_counter() - start
+            self.heuristicCalls += 1
+            return value
+        return timedHeuristic
+
+    def recordFringe(self, size):
+        if size > self.peakFringe:
+            self.peakFringe = size
+
+    def asDict(self):
+        return {'expanded': self.expanded,
+                'generated': self.generated,
+                'duplicatesPruned': self.duplicatesPruned,
+                'peakFringe': self.peakFringe,
+                'successorTime': self.successorTime,
+                'heuristicTime': self.heuristicTime,
+                'heuristicCalls': self.heuristicCalls,
+                'cellExpansions': [[x, y, count] for (x, y), count in sorted(self.cellExpansions.items())]}
+
+    def toJson(self):
+        return json.dumps(self.asDict(), indent=2)
+
+    def toCsv(self):
+        """
+        One table with columns statistic,x,y,value.  Summary rows leave x and
+        y empty; the heatmap has one cellExpansions row per cell.
+        """
+        rows = ['statistic,x,y,value']
+        for name, value in self.asDict().items():
+            if name != 'cellExpansions':
+                rows.append('%s,,,%s' % (name, value))
+        for x, y, count in self.asDict()['cellExpansions']:
+            rows.append('cellExpansions,%d,%d,%d' % (x, y, count))
+        return '\n'.join(rows) + '\n'
+
+    def save(self, filename):
+        "Writes the statistics as CSV if filename ends in .csv, as JSON otherwise"
+        with open(filename, 'w') as f:
+            f.write(self.toCsv() if filename.endswith('.csv') else self.toJson())
+
+    def __str__(self):
+        return ('Search statistics: %d expanded, %d generated, %d duplicates pruned, peak fringe %d\n'
+                '  %.3fs in getSuccessors, %.3fs in %d heuristic calls' %
+                (self.expanded, self.generated, self.duplicatesPruned, self.peakFringe,
+                 self.successorTime, self.heuristicTime, self.heuristicCalls))
+
+
+class InstrumentedProblem(SearchProblem):
+    """
+    Wraps a SearchProblem and records every getSuccessors call in a
+    SearchStatistics object.  Everything else is passed through unchanged.
+    """
+
+    def __init__(self, problem, stats):
+        self.problem = problem
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        start = time.perf_counter()
+        successors = self.problem.getSuccessors(state)
+        self.stats.successorTime += time.perf_counter() - start
+        self.stats.expanded += 1
+        self.stats.generated += len(successors)
+        cell = self.stats.cellOf(state)
+        if cell is not None:
+            self.stats.cellExpansions[cell] += 1
+        return successors
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+
+class MemoizedProblem(SearchProblem):
+    """
+    Wraps a SearchProblem and remembers its getSuccessors results and the
+    values of its heuristic in least-recently-used caches:
+
+      problem = MemoizedProblem(FoodSearchProblem(state), maxEntries=50000)
+      path = aStarSearch(problem, foodHeuristic)
+      print(problem)
+
+    aStarSearch and anytimeAStarSearch notice the wrapper and route the
+    heuristic through memoizeHeuristic(), which always calls it with the
+    real problem so problem.heuristicInfo keeps working.
+
+      maxEntries: entries kept in each cache
+      maxBytes:   rough cap on the memory of both caches together, counting
+                  the shallow size of each key and value
+      key:        maps a state to the hashable key it is cached under, for
+                  states whose own hash is slow or too fine-grained
+    """
+
+    def __init__(self, problem, maxEntries=100000, maxBytes=None, key=None):
+        self.problem = problem
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.key = key if key is not None else lambda state: state
+        self.successorCache = collections.OrderedDict()
+        self.heuristicCache = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = util.Counter()
+        self.misses = util.Counter()
+        self.evictions = util.Counter()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        return self.lookup(self.successorCache, 'successors', state, self.problem.getSuccessors)
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+    def memoizeHeuristic(self, heuristic):
+        "Returns heuristic with its values cached in this wrapper"
+        problem = self.problem
+        def memoizedHeuristic(state, _=None):
+            return self.lookup(self.heuristicCache, 'heuristic', state, lambda s: heuristic(s, problem))
+        return memoizedHeuristic
+
+    def lookup(self, cache, name, state, compute):
+        key = self.key(state)
+        if key in cache:
+            self.hits[name] += 1
+            cache.move_to_end(key)
+            return cache[key][0]
+        self.misses[name] += 1
+        value = compute(state)
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+        cache[key] = (value, size)
+        self.bytes += size
+        while len(cache) > self.maxEntries:
+            self.evict(cache, name)
+        while self.maxBytes is not None and self.bytes > self.maxBytes and (self.successorCache or
+                                                                            self.heuristicCache):
+            # the successor lists are the big entries, so they go first
+            if self.successorCache:
+                self.evict(self.successorCache, 'successors')
+            else:
+                self.evict(self.heuristicCache, 'heuristic')
+        return value
+
+    def evict(self, cache, name):
+        _, (_, size) = cache.popitem(last=False)
+        self.bytes -= size
+        self.evictions[name] += 1
+
+    def hitRate(self, name):
+        calls = self.hits[name] + self.misses[name]
+        return self.hits[name] / float(calls) if calls else 0.0
+
+    def __str__(self):
+        return ('Memoization: successors %d hits / %d misses (%.0f%%), heuristic %d hits / %d misses (%.0f%%)\n'
+                '  %d evictions, about %.1f MB cached' %
+                (self.hits['successors'], self.misses['successors'], 100 * self.hitRate('successors'),
+                 self.hits['heuristic'], self.misses['heuristic'], 100 * self.hitRate('heuristic'),
+                 self.evictions.totalCount(), self.bytes / 1e6))
+
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other maze, the
@@ -75,7 +326,7 @@ def tinyMazeSearch(problem):
     return [s, s, w, s, w, w, s, w]
 
 
-def depthFirstSearch(problem):
+def depthFirstSearch(problem, stats=None):
     """
     Search the deepest nodes in the search tree first.
 
@@ -88,8 +339,13 @@ def depthFirstSearch(problem):
     print("Start:", problem.getStartState())
     print("Is the start a goal?", problem.isGoalState(problem.getStartState()))
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
+
+    Like the other searches it fills in a SearchStatistics object passed as
+    stats.
     """
     "*** YOUR CODE HERE ***"
+    if stats is not None:
+        problem, _ = stats.instrument(problem)
     # initialize a set to detect whether a node has been visited or not
     visited = set()
     # implement DFS using the stack structure
@@ -100,6 +356,7 @@ def depthFirstSearch(problem):
     fringe.push((problem.getStartState(), []))
     # DFS
     while not fringe.isEmpty():
+        if stats is not None: stats.recordFringe(len(fringe))
         state, path = fringe.pop()
         # determine when to stop the loop,
         # isGoalState() returns the boolean value whether the current state is the goal
@@ -111,17 +368,22 @@ def depthFirstSearch(problem):
             # update the stack fringe
             for successor in problem.getSuccessors(state):
                 fringe.push((successor[2], path + [successor[0]]))
+        elif stats is not None:
+            stats.duplicatesPruned += 1
     util.raiseNotDefined()
 
 
-def breadthFirstSearch(problem):
+def breadthFirstSearch(problem, stats=None):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
+    if stats is not None:
+        problem, _ = stats.instrument(problem)
     # almost same implementation as DFS, just change the structure stack to queue
     visited = set()
     fringe = util.Queue()
     fringe.push((problem.getStartState(), []))
     while not fringe.isEmpty():
+        if stats is not None: stats.recordFringe(len(fringe))
         state, path = fringe.pop()
         if problem.isGoalState(state):
             return path
@@ -129,24 +391,38 @@ def breadthFirstSearch(problem):
             visited.add(state)
             for successor in problem.getSuccessors(state):
                 fringe.push((successor[2], path + [successor[0]]))
+        elif stats is not None:
+            stats.duplicatesPruned += 1
     util.raiseNotDefined()
 
 
-def uniformCostSearch(problem):
+def uniformCostSearch(problem, stats=None):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
+    if stats is not None:
+        problem, _ = stats.instrument(problem)
     visited = set()
-    fringe = util.PriorityQueue()
+    # step costs are almost always small integers, so a bucket queue is used;
+    # a cost it cannot bucket (fractional or exponential) switches to a heap
+    fringe = util.BucketQueue()
     # the criterion for the priority is the accumulated cost from root to the current node
     fringe.push((problem.getStartState(), [], 0), 0)
     while not fringe.isEmpty():
+        if stats is not None: stats.recordFringe(len(fringe))
         state, path, cost = fringe.pop()
         if problem.isGoalState(state):
             return path
         if state not in visited:
             visited.add(state)
             for successor in problem.getSuccessors(state):
-                fringe.push((successor[2], path + [successor[0]], cost + successor[1]), cost + successor[1])
+                node = (successor[2], path + [successor[0]], cost + successor[1])
+                try:
+                    fringe.push(node, cost + successor[1])
+                except ValueError:
+                    fringe = fringe.toPriorityQueue()
+                    fringe.push(node, cost + successor[1])
+        elif stats is not None:
+            stats.duplicatesPruned += 1
     util.raiseNotDefined()
 
 
@@ -158,27 +434,506 @@ def nullHeuristic(state, problem=None):
     return 0
 
 
-def aStarSearch(problem, heuristic=nullHeuristic):
+def aStarSearch(problem, heuristic=nullHeuristic, stats=None):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
+    if hasattr(problem, 'memoizeHeuristic'):
+        heuristic = problem.memoizeHeuristic(heuristic)
+    if stats is not None:
+        problem, heuristic = stats.instrument(problem, heuristic)
     visited = set()
-    fringe = util.PriorityQueue()
+    # same bucket queue as UCS; a fractional heuristic value switches to a heap
+    fringe = util.BucketQueue()
     # the criterion for the priority is the heuristic function
     fringe.push((problem.getStartState(), [], 0), heuristic(problem.getStartState(), problem))
     while not fringe.isEmpty():
+        if stats is not None: stats.recordFringe(len(fringe))
         state, path, cost = fringe.pop()
         if problem.isGoalState(state):
             return path
         if state not in visited:
             visited.add(state)
             for successor in problem.getSuccessors(state):
-                fringe.push((successor[2], path + [successor[0]], cost + successor[1]),
-                            cost + successor[1] + heuristic(successor[2], problem))
+                node = (successor[2], path + [successor[0]], cost + successor[1])
+                priority = cost + successor[1] + heuristic(successor[2], problem)
+                try:
+                    fringe.push(node, priority)
+                except ValueError:
+                    fringe = fringe.toPriorityQueue()
+                    fringe.push(node, priority)
+        elif stats is not None:
+            stats.duplicatesPruned += 1
     util.raiseNotDefined()
 
 
+def anytimeAStarSearch(problem, heuristic=nullHeuristic, timeLimit=None, weight=2.5, initialPath=None,
+                       stats=None):
+    """
+    Anytime repairing A* (ARA*).
+
+    The first pass runs weighted A* with priority g + weight * h, which finds a
+    solution quickly.  The weight is then lowered step by step towards 1 and
+    every pass repairs the previous search tree instead of starting over, so
+    each solution is at least as cheap as the one before.
+
+    The search stops when a pass with weight 1 completes (the path is then
+    optimal) or when timeLimit seconds have passed, and returns the best path
+    found.  It never stops before it has some solution; initialPath, if
+    given, counts as the first one.  The current sub-optimality bound, the
+    factor by which the returned path may exceed the optimum, is kept in
+    problem._suboptimality.
+    """
+    original = problem
+    if hasattr(problem, 'memoizeHeuristic'):
+        heuristic = problem.memoizeHeuristic(heuristic)
+    if stats is not None:
+        problem, heuristic = stats.instrument(problem, heuristic)
+    deadline = None if timeLimit is None else time.time() + float(timeLimit)
+    weight = float(weight)
+
+    startState = problem.getStartState()
+    if problem.isGoalState(startState):
+        return []
+    bestCost, bestPath = float('inf'), None
+    if initialPath is not None:
+        bestCost, bestPath = problem.getCostOfActions(initialPath), initialPath
+
+    # heuristic values never change, so each state is evaluated only once
+    hValues = {}
+    def h(state):
+        if state not in hValues:
+            hValues[state] = heuristic(state, problem)
+        return hValues[state]
+
+    def pathTo(state):
+        path = []
+        while parents[state] is not None:
+            state, action = parents[state]
+            path.append(action)
+        path.reverse()
+        return path
+
+    costs, parents = {startState: 0}, {startState: None}
+    # states in OPEN with their current key; stale fringe entries are skipped
+    keys = {startState: weight * h(startState)}
+    closed, inconsistent = set(), set()
+    fringe = util.PriorityQueue()
+    fringe.push(startState, keys[startState])
+    timedOut = False
+    while True:
+        # improve the path with the current weight
+        while not fringe.isEmpty() and fringe.peek()[0] < bestCost:
+            if deadline is not None and bestPath is not None and time.time() > deadline:
+                timedOut = True
+                break
+            if stats is not None: stats.recordFringe(len(fringe))
+            key, state = fringe.peek()
+            fringe.pop()
+            if keys.get(state) != key:
+                if stats is not None: stats.duplicatesPruned += 1
+                continue
+            del keys[state]
+            closed.add(state)
+            for action, stepCost, successor in problem.getSuccessors(state):
+                cost = costs[state] + stepCost
+                if cost >= costs.get(successor, float('inf')):
+                    continue
+                costs[successor] = cost
+                parents[successor] = (state, action)
+                if problem.isGoalState(successor):
+                    if cost < bestCost:
+                        bestCost, bestPath = cost, pathTo(successor)
+                elif successor in closed:
+                    inconsistent.add(successor)
+                else:
+                    keys[successor] = cost + weight * h(successor)
+                    fringe.push(successor, keys[successor])
+
+        if bestPath is None:
+            util.raiseNotDefined()
+        # sub-optimality bound: no solution can beat the smallest g + h still pending
+        pending = [costs[state] + h(state) for state in list(keys) + list(inconsistent)]
+        lowerBound = min(pending) if pending else bestCost
+        bound = bestCost / lowerBound if lowerBound > 0 else float('inf')
+        if not timedOut:
+            # a completed pass also guarantees the weight itself
+            bound = min(weight, bound)
+        original._suboptimality = max(1.0, bound)
+        if timedOut or weight == 1.0 or original._suboptimality == 1.0:
+            return bestPath
+
+        # lower the weight and reopen the states that became inconsistent
+        weight = max(1.0, weight - 0.5)
+        for state in inconsistent:
+            keys[state] = None
+        fringe = util.PriorityQueue()
+        for state in keys:
+            keys[state] = costs[state] + weight * h(state)
+            fringe.push(state, keys[state])
+        closed, inconsistent = set(), set()
+
+
+class GridDistanceField:
+    """
+    Breadth-first distances on a walls Grid computed a whole level at a time.
+
+    The open cells are packed into one Python integer, bit x * height + y for
+    cell (x, y), so a frontier is a set of bits and growing it by one step is
+    four shifts, an OR and an AND with the open cells:
+
+      north  << 1        east  << height
+      south  >> 1        west  >> height
+
+    Every source starts at distance 0.  If targets are given, as cells or
+    as a bitboard targetBits, the search stops at the first level that
+    reaches one of them, otherwise it runs until every reachable cell has a
+    distance.
+    """
+
+    def __init__(self, walls, sources, targets=None, targetBits=0):
+        self.width, self.height = walls.width, walls.height
+        self.openCells, self.notTop, self.notBottom = _gridMasks(walls)
+        self.levels = []    # levels[d] has the bits of the cells at distance d
+        self.reached = 0
+        frontier = 0
+        for cell in sources:
+            frontier |= 1 << self.bit(cell)
+        frontier &= self.openCells
+        for cell in targets or []:
+            targetBits |= 1 << self.bit(cell)
+        while frontier:
+            self.levels.append(frontier)
+            self.reached |= frontier
+            if frontier & targetBits:
+                break
+            frontier = self.grow(frontier) & ~self.reached
+        self.targetsReached = targetBits & self.levels[-1] if self.levels else 0
+
+    def grow(self, bits):
+        "The open cells one step from any of bits"
+        height = self.height
+        return (((bits & self.notTop) << 1) | ((bits & self.notBottom) >> 1) |
+                (bits << height) | (bits >> height)) & self.openCells
+
+    def bit(self, cell):
+        return int(cell[0]) * self.height + int(cell[1])
+
+    def cellOfBit(self, bit):
+        return divmod(bit, self.height)
+
+    def cellsIn(self, bits):
+        "The cells whose bits are set, in bit order"
+        cells = []
+        while bits:
+            low = bits & -bits
+            cells.append(self.cellOfBit(low.bit_length() - 1))
+            bits ^= low
+        return cells
+
+    def distance(self, cell):
+        "The distance of cell from the nearest source, None if not reached"
+        mask = 1 << self.bit(cell)
+        if not self.reached & mask:
+            return None
+        for distance, level in enumerate(self.levels):
+            if level & mask:
+                return distance
+
+    def distances(self):
+        "A dictionary from every reached cell to its distance"
+        return dict((cell, distance) for distance, level in enumerate(self.levels)
+                    for cell in self.cellsIn(level))
+
+    def closestTargets(self):
+        "The targets at the smallest distance, empty if none was reached"
+        return self.cellsIn(self.targetsReached)
+
+    def pathTo(self, cell):
+        """
+        The actions of a shortest path from one of the sources to cell, or
+        None if cell was not reached.  The path is walked backwards through
+        the levels, trying neighbours in a fixed order.
+        """
+        distance = self.distance(cell)
+        if distance is None:
+            return None
+        steps = [(Directions.SOUTH, 1), (Directions.NORTH, -1),
+                 (Directions.WEST, self.height), (Directions.EAST, -self.height)]
+        bit, actions = self.bit(cell), []
+        for level in reversed(self.levels[:distance]):
+            for action, offset in steps:
+                neighbour = bit + offset
+                if neighbour < 0 or (abs(offset) == 1 and neighbour // self.height != bit // self.height):
+                    continue
+                if (level >> neighbour) & 1:
+                    actions.append(action)
+                    bit = neighbour
+                    break
+        actions.reverse()
+        return actions
+
+    def firstPathToTarget(self):
+        """
+        Returns (path, target) for the path that uniformCostSearch would find
+        from a single source to the closest targets, or (None, None) if no
+        target was reached.  That is the first of the shortest paths in the
+        successor order of PositionSearchProblem (north, south, east, west),
+        since first-in first-out ties expand the cells of a level in that
+        order.  The levels are walked back from the targets to keep only the
+        cells on a shortest path, and then forwards taking the first move
+        that stays on one.
+        """
+        if not self.targetsReached:
+            return None, None
+        onPath = [self.targetsReached]
+        for level in reversed(self.levels[:-1]):
+            onPath.append(self.grow(onPath[-1]) & level)
+        onPath.reverse()
+        height = self.height
+        bit, actions = onPath[0].bit_length() - 1, []
+        for cells in onPath[1:]:
+            y = bit % height
+            if y < height - 1 and (cells >> (bit + 1)) & 1:
+                actions.append(Directions.NORTH)
+                bit += 1
+            elif y > 0 and (cells >> (bit - 1)) & 1:
+                actions.append(Directions.SOUTH)
+                bit -= 1
+            elif (cells >> (bit + height)) & 1:
+                actions.append(Directions.EAST)
+                bit += height
+            else:
+                actions.append(Directions.WEST)
+                bit -= height
+        return actions, self.cellOfBit(bit)
+
+
+_gridMaskCache = {}
+
+def _gridMasks(walls):
+    """
+    (open cells, cells not on the top row, cells not on the bottom row) as
+    bitboards, cached for the walls Grid object.
+    """
+    if id(walls) not in _gridMaskCache or _gridMaskCache[id(walls)][0] is not walls:
+        openCells = notTop = notBottom = 0
+        for x in range(walls.width):
+            for y in range(walls.height):
+                bit = 1 << (x * walls.height + y)
+                if not walls[x][y]:
+                    openCells |= bit
+                if y < walls.height - 1:
+                    notTop |= bit
+                if y > 0:
+                    notBottom |= bit
+        _gridMaskCache[id(walls)] = (walls, (openCells, notTop, notBottom))
+    return _gridMaskCache[id(walls)][1]
+
+
+def gridBreadthFirstSearch(problem, stats=None):
+    """
+    Breadth-first search with GridDistanceField for problems whose states are
+    grid cells with unit steps.  A problem opts in by having walls and a
+    gridTargets() method that returns its goal cells; any other problem, or
+    a call that collects statistics, falls back to breadthFirstSearch.
+    """
+    if stats is not None or 'gridTargets' not in dir(problem) or 'walls' not in dir(problem):
+        return breadthFirstSearch(problem, stats)
+    field = GridDistanceField(problem.walls, [problem.getStartState()], problem.gridTargets())
+    if '_expanded' in dir(problem):
+        problem._expanded += bin(field.reached ^ field.levels[-1]).count('1')
+    targets = field.closestTargets()
+    if not targets:
+        util.raiseNotDefined()
+    return field.pathTo(targets[0])
+
+
+class ExternalBreadthFirstSearch:
+    """
+    Breadth-first search with its layers on disk, for state spaces whose
+    visited set does not fit in memory.
+
+    The problem must encode states as fixed-length byte strings with
+    encodeState(state) and turn them back with decodeState(code).  A layer
+    file holds sorted (state, parent) records.  Layer d + 1 is built from
+    layer d by:
+
+      1. streaming layer d and generating successors into a buffer of at most
+         memoryLimit records, sorted and written out as a run when full
+      2. merging the runs, dropping repeated states, and merge-joining the
+         result against the previous duplicateScope layers (all of them if
+         None) to drop states that were reached before
+
+    so memory holds one buffer plus one record per run and per layer.  In a
+    reversible problem every successor of layer d lies in layer d - 1, d or
+    d + 1, so a scope of 2 is enough.
+    A line of progress is printed after every layer if report is set.
+    """
+
+    def __init__(self, problem, directory=None, memoryLimit=100000, duplicateScope=None, report=True):
+        self.problem = problem
+        self.memoryLimit = memoryLimit
+        self.duplicateScope = duplicateScope
+        self.report = report
+        self.ownDirectory = directory is None
+        self.directory = tempfile.mkdtemp(prefix='ebfs-') if directory is None else directory
+        self.stateBytes = len(problem.encodeState(problem.getStartState()))
+        self.recordBytes = 2 * self.stateBytes
+        self.layerSizes = []
+        self.runs = 0
+
+    def layerFile(self, depth):
+        return os.path.join(self.directory, 'layer-%d.bin' % depth)
+
+    def records(self, filename):
+        "Streams the (state, parent) records of a file"
+        chunk = self.recordBytes * 4096
+        with open(filename, 'rb') as f:
+            while True:
+                data = f.read(chunk)
+                if not data:
+                    break
+                for i in range(0, len(data), self.recordBytes):
+                    yield data[i:i + self.stateBytes], data[i + self.stateBytes:i + self.recordBytes]
+
+    def writeRun(self, buffer, runFiles):
+        buffer.sort()
+        runFiles.append(os.path.join(self.directory, 'run-%d.bin' % len(runFiles)))
+        with open(runFiles[-1], 'wb') as f:
+            f.write(b''.join(state + parent for state, parent in buffer))
+        self.runs += 1
+        del buffer[:]
+
+    def expandLayer(self, depth):
+        """
+        Writes layer depth + 1 and returns (its size, the code of a goal state
+        in it or None).
+        """
+        problem, encode = self.problem, self.problem.encodeState
+        buffer, runFiles, goal = [], [], None
+        for code, _ in self.records(self.layerFile(depth)):
+            for _, _, successor in problem.getSuccessors(problem.decodeState(code)):
+                successorCode = encode(successor)
+                if goal is None and problem.isGoalState(successor):
+                    goal = successorCode
+                buffer.append((successorCode, code))
+                if len(buffer) >= self.memoryLimit:
+                    self.writeRun(buffer, runFiles)
+        if buffer:
+            self.writeRun(buffer, runFiles)
+
+        first = 0 if self.duplicateScope is None else max(0, depth + 1 - self.duplicateScope)
+        previous = [self.records(self.layerFile(d)) for d in range(first, depth + 1)]
+        heads = [next(layer, None) for layer in previous]
+        size, last = 0, None
+        with open(self.layerFile(depth + 1), 'wb') as out:
+            for state, parent in heapq.merge(*[self.records(run) for run in runFiles]):
+                if state == last:
+                    continue
+                last = state
+                seen = False
+                for i, layer in enumerate(previous):
+                    while heads[i] is not None and heads[i][0] < state:
+                        heads[i] = next(layer, None)
+                    if heads[i] is not None and heads[i][0] == state:
+                        seen = True
+                        break
+                if not seen:
+                    out.write(state + parent)
+                    size += 1
+        for run in runFiles:
+            os.remove(run)
+        return size, goal
+
+    def findRecord(self, depth, state):
+        "Binary search of a sorted layer file for the parent of state"
+        with open(self.layerFile(depth), 'rb') as f:
+            low, high = 0, os.path.getsize(self.layerFile(depth)) // self.recordBytes
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(middle * self.recordBytes)
+                record = f.read(self.recordBytes)
+                if record[:self.stateBytes] < state:
+                    low = middle + 1
+                else:
+                    high = middle
+            f.seek(low * self.recordBytes)
+            record = f.read(self.recordBytes)
+        return record[self.stateBytes:]
+
+    def pathTo(self, code, depth):
+        "The actions from the start to the state with this code in layer depth"
+        problem, actions = self.problem, []
+        while depth > 0:
+            parent = self.findRecord(depth, code)
+            for action, _, successor in problem.getSuccessors(problem.decodeState(parent)):
+                if problem.encodeState(successor) == code:
+                    actions.append(action)
+                    break
+            code, depth = parent, depth - 1
+        actions.reverse()
+        return actions
+
+    def run(self, stopAtGoal=True):
+        """
+        Searches layer by layer.  Returns the path to the first goal found,
+        or None once the whole state space has been explored without one (or
+        at all, if stopAtGoal is False).  layerSizes holds the number of new
+        states in every layer.
+        """
+        start = self.problem.getStartState()
+        startCode = self.problem.encodeState(start)
+        if stopAtGoal and self.problem.isGoalState(start):
+            return []
+        with open(self.layerFile(0), 'wb') as f:
+            f.write(startCode + startCode)
+        self.layerSizes = [1]
+        started = time.time()
+        try:
+            while True:
+                depth = len(self.layerSizes) - 1
+                size, goal = self.expandLayer(depth)
+                if size == 0:
+                    return None
+                self.layerSizes.append(size)
+                if self.report:
+                    diskBytes = sum(os.path.getsize(self.layerFile(d)) for d in range(depth + 2))
+                    print('[ExternalBFS] layer %d: %d states, %d in total, %d runs, %.1f MB on disk, %.1fs' %
+                          (depth + 1, size, sum(self.layerSizes), self.runs, diskBytes / 1e6, time.time() - started))
+                if stopAtGoal and goal is not None:
+                    return self.pathTo(goal, depth + 1)
+        finally:
+            if self.ownDirectory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def externalBreadthFirstSearch(problem, memoryLimit=100000, duplicateScope=None):
+    """
+    Breadth-first search with delayed duplicate detection on disk, see
+    ExternalBreadthFirstSearch.  The problem needs encodeState and
+    decodeState.
+    """
+    path = ExternalBreadthFirstSearch(problem, memoryLimit=memoryLimit, duplicateScope=duplicateScope).run()
+    if path is None:
+        util.raiseNotDefined()
+    return path
+
+
+def parallelAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    A* spread over several processes by hashing states to workers (HDA*).
+    Returns a path of the same cost as aStarSearch; see parallelSearch.py.
+    """
+    from parallelSearch import hdaStarSearch
+    return hdaStarSearch(problem, heuristic)
+
+
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+hdastar = parallelAStarSearch
+anytime = anytimeAStarSearch
+gbfs = gridBreadthFirstSearch
+ebfs = externalBreadthFirstSearch
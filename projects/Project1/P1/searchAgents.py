@@ -40,6 +40,12 @@ from game import Actions
 import util
 import time
 import search
+import collections
+import tourPlanner
+import landmarks
+import hierarchicalSearch
+import junctionGraph
+import incrementalSearch
 
 
 class GoWestAgent(Agent):
@@ -75,16 +81,40 @@ class SearchAgent(Agent):
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic',
+                 timeLimit=None, stats=None, memoize=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+
+        # Extra keyword arguments for searches that support them
+        options = {}
+        # Anytime searches take a wall-clock budget in seconds
+        if timeLimit is not None:
+            if 'timeLimit' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not accept a timeLimit.')
+            print('[SearchAgent] using a time limit of %s seconds' % timeLimit)
+            options['timeLimit'] = float(timeLimit)
+        # Search statistics are collected and saved to a .json or .csv file
+        if stats is not None:
+            if 'stats' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not collect search statistics.')
+            print('[SearchAgent] saving search statistics to ' + stats)
+            self.statistics = search.SearchStatistics()
+            self.statsFile = stats
+            options['stats'] = self.statistics
+
+        # Successors and heuristic values are cached for up to this many states
+        self.memoize = int(memoize) if memoize is not None else None
+        if self.memoize is not None:
+            print('[SearchAgent] memoizing up to %d states' % self.memoize)
+
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **options)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -94,7 +124,7 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **options)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -113,11 +143,20 @@ class SearchAgent(Agent):
         """
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
+        if 'statistics' in dir(self): self.statistics.reset()
         problem = self.searchType(state)  # Makes a new search problem
-        self.actions = self.searchFunction(problem)  # Find a path
+        searchProblem = problem
+        if getattr(self, 'memoize', None) is not None: searchProblem = search.MemoizedProblem(problem, self.memoize)
+        self.actions = self.searchFunction(searchProblem)  # Find a path
+        if 'expandActions' in dir(problem): self.actions = problem.expandActions(self.actions)
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_suboptimality' in dir(problem): print('Sub-optimality bound: %.2f' % problem._suboptimality)
+        if searchProblem is not problem: print(searchProblem)
+        if 'statistics' in dir(self):
+            print(self.statistics)
+            self.statistics.save(self.statsFile)
 
     def getAction(self, state):
         """
@@ -213,6 +252,10 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def gridTargets(self):
+        "The goal cells, for search.gridBreadthFirstSearch"
+        return [self.goal]
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -230,6 +273,41 @@ class PositionSearchProblem(search.SearchProblem):
         return cost
 
 
+class CorridorSearchProblem(PositionSearchProblem):
+    """
+    A unit-cost PositionSearchProblem on the corridor-compressed junction
+    graph of the layout.  Each action is the whole tuple of moves along one
+    corridor, so only junctions, dead ends, the start and the goal are ever
+    expanded; expandActions() flattens a solution into single moves.
+
+    > python pacman.py -l bigMaze -p SearchAgent -a fn=ucs,prob=CorridorSearchProblem -z .5
+    """
+
+    def __init__(self, gameState, goal=(1, 1), start=None, warn=True, visualize=True):
+        PositionSearchProblem.__init__(self, gameState, goal=goal, start=start, warn=warn, visualize=visualize)
+        self.graph = junctionGraph.junctionGraph(self.walls)
+
+    def getSuccessors(self, state):
+        successors = [(actions, cost, nextState)
+                      for actions, cost, nextState in self.graph.successors(state, [self.goal])]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def expandActions(self, actions):
+        "Turns a list of corridor walks into a list of single moves"
+        if actions == None: return None
+        return [move for walk in actions for move in ((walk,) if isinstance(walk, str) else walk)]
+
+    def getCostOfActions(self, actions):
+        return PositionSearchProblem.getCostOfActions(self, self.expandActions(actions))
+
+
 class StayEastSearchAgent(SearchAgent):
     """
     An agent for position search with a cost function that penalizes being in
@@ -260,6 +338,252 @@ class StayWestSearchAgent(SearchAgent):
         self.searchType = lambda state: PositionSearchProblem(state, costFn)
 
 
+class DStarLiteAgent(Agent):
+    """
+    Walks to the single dot of a maze, treating every cell within radius of a
+    ghost as costing penalty instead of 1.  The D* Lite planner keeps its
+    search tree between moves, so each move only repairs the part of the plan
+    that the ghosts changed.
+
+    > python pacman.py -l mediumScaryMaze -p DStarLiteAgent -a radius=2
+    """
+
+    def __init__(self, radius=2, penalty=50):
+        self.radius = int(radius)
+        self.penalty = float(penalty)
+
+    def registerInitialState(self, state):
+        goal = state.getFood().asList()[0]
+        self.planner = incrementalSearch.DStarLite(state.getWalls(), state.getPacmanPosition(), goal)
+        self.penalised = set()
+
+    def dangerousCells(self, state):
+        walls, cells = state.getWalls(), set()
+        for ghostX, ghostY in state.getGhostPositions():
+            ghostX, ghostY = int(ghostX + 0.5), int(ghostY + 0.5)
+            for x in range(max(0, ghostX - self.radius), min(walls.width, ghostX + self.radius + 1)):
+                for y in range(max(0, ghostY - self.radius), min(walls.height, ghostY + self.radius + 1)):
+                    if not walls[x][y] and abs(x - ghostX) + abs(y - ghostY) <= self.radius:
+                        cells.add((x, y))
+        return cells
+
+    def getAction(self, state):
+        planner = self.planner
+        if state.getPacmanPosition() != planner.start:
+            planner.moveTo(state.getPacmanPosition())
+        danger = self.dangerousCells(state)
+        changes = dict((cell, 1) for cell in self.penalised - danger)
+        changes.update((cell, self.penalty) for cell in danger - self.penalised)
+        planner.updateCosts(changes)
+        self.penalised = danger
+        planner.computeShortestPath()
+        path = planner.path()
+        if not path:
+            return Directions.STOP
+        return path[0]
+
+
+class RealTimeSearchAgent(Agent):
+    """
+    Real-time adaptive A* (RTAA*, Koenig and Likhachev): instead of planning
+    the whole path up front, every move runs an A* lookahead that stops
+    after lookahead expansions or moveTime milliseconds, takes the first
+    step towards the best frontier state and raises the heuristic of every
+    expanded state s to f(best) - g(s).  With lookahead=1 this is LRTA*.
+
+    The learned heuristic is kept for the lifetime of the agent, so over
+    repeated games on the same layout (-n) the paths converge to optimal
+    ones while each move stays within its budget.  Learned values only ever
+    rise.  After a trial that reaches the goal they are backed up through
+    every state learned so far, and the transitions taken give upper bounds
+    on the cost to the goal.  The next trial gets the moves of the last one
+    as a budget: a lookahead step is only taken while those bounds show the
+    goal can still be reached within it, otherwise the agent follows the
+    bounds.  So trials never get longer.
+
+    > python pacman.py -l bigMaze -p RealTimeSearchAgent -a lookahead=20 -n 5 -q
+    """
+
+    def __init__(self, prob='PositionSearchProblem', heuristic='manhattanHeuristic', lookahead=20,
+                 moveTime=None):
+        if prob not in globals().keys() or not prob.endswith('Problem'):
+            raise AttributeError(prob + ' is not a search problem type in SearchAgents.py.')
+        if heuristic in globals().keys():
+            self.heuristic = globals()[heuristic]
+        elif heuristic in dir(search):
+            self.heuristic = getattr(search, heuristic)
+        else:
+            raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
+        self.searchType = globals()[prob]
+        if 'visualize' in self.searchType.__init__.__code__.co_varnames:
+            # a problem is built every move, so keep it from warning or drawing each time
+            problemType = self.searchType
+            self.searchType = lambda state: problemType(state, warn=False, visualize=False)
+        self.lookahead = int(lookahead)
+        self.moveTime = float(moveTime) / 1000 if moveTime is not None else None
+        self.learned = {}
+        self.trials = 0
+        self.transitions = collections.defaultdict(dict)   # state -> {successor: cost} taken so far
+        self.upper = {}                                     # state -> upper bound on its cost to the goal
+        self.budget = float('inf')
+
+    def registerInitialState(self, state):
+        self.trials += 1
+        self.moves, self.expanded, self.slowestMove = 0, 0, 0.0
+        self.spent = 0
+        self.bounds = dict(self.upper)
+
+    def estimate(self, state, problem):
+        if state in self.learned:
+            return self.learned[state]
+        return self.heuristic(state, problem)
+
+    def bound(self, state, problem=None):
+        """
+        An upper bound on the cost from state to the goal along transitions
+        taken before, infinite if none is known.  Given the problem, a state
+        without one is bounded through its successors that have one.
+        """
+        if state in self.bounds or problem is None:
+            return self.bounds.get(state, float('inf'))
+        return min([stepCost + self.bounds.get(successor, float('inf'))
+                    for _, stepCost, successor in problem.getSuccessors(state)] + [float('inf')])
+
+    def getAction(self, state):
+        started = time.time()
+        problem = self.searchType(state)
+        start = problem.getStartState()
+        if problem.isGoalState(start):
+            return Directions.STOP
+
+        # bounded A* lookahead from the current state
+        costs, parents = {start: 0}, {start: None}
+        fringe = util.PriorityQueue()
+        fringe.push((0, start), self.estimate(start, problem))
+        closed = []
+        while not fringe.isEmpty() and len(closed) < self.lookahead:
+            if self.moveTime is not None and closed and time.time() - started > self.moveTime:
+                break
+            cost, node = fringe.peek()[1]
+            if cost > costs[node]:
+                fringe.pop()
+                continue
+            if problem.isGoalState(node):
+                break
+            fringe.pop()
+            closed.append(node)
+            for action, stepCost, successor in problem.getSuccessors(node):
+                if cost + stepCost < costs.get(successor, float('inf')):
+                    costs[successor] = cost + stepCost
+                    parents[successor] = (node, action)
+                    fringe.push((cost + stepCost, successor), cost + stepCost + self.estimate(successor, problem))
+        while not fringe.isEmpty() and fringe.peek()[1][0] > costs[fringe.peek()[1][1]]:
+            fringe.pop()
+        if fringe.isEmpty():
+            return Directions.STOP
+
+        # learn from the lookahead and step towards the best frontier state
+        bestF, (bestCost, best) = fringe.peek()
+        for node in closed:
+            self.learned[node] = max(self.estimate(node, problem), bestF - costs[node])
+        while parents[best][0] != start:
+            best = parents[best][0]
+        action, successor, stepCost = parents[best][1], best, costs[best]
+
+        # keep within the budget set by the last trial
+        if self.budget < float('inf'):
+            remaining = self.bound(successor, problem)
+            if self.spent + stepCost + remaining > self.budget:
+                remaining, _, action, stepCost, successor = min(
+                    (stepCost + self.bound(successor), i, action, stepCost, successor)
+                    for i, (action, stepCost, successor) in enumerate(problem.getSuccessors(start)))
+                remaining -= stepCost
+            self.bounds[successor] = min(self.bound(successor), remaining)
+        self.transitions[start][successor] = min(stepCost, self.transitions[start].get(successor, float('inf')))
+        self.spent += stepCost
+        self.moves += 1
+        self.expanded += len(closed)
+        self.slowestMove = max(self.slowestMove, time.time() - started)
+        return action
+
+    def final(self, state):
+        problem = self.searchType(state)
+        if problem.isGoalState(problem.getStartState()):
+            self.backUp(problem)
+            self.budget = min(self.budget, self.spent)
+        print('[RealTimeSearchAgent] trial %d: %d moves, %d expansions, slowest move %.1f ms, %d states learned' %
+              (self.trials, self.moves, self.expanded, self.slowestMove * 1000, len(self.learned)))
+
+    def backUp(self, problem):
+        """
+        After reaching the goal: raises every learned value to the cheapest
+        step plus estimate of its successors until none changes, and sets
+        the upper bounds to the costs to the goal along the transitions taken.
+        """
+        successors = dict((node, problem.getSuccessors(node)) for node in self.learned)
+        predecessors = collections.defaultdict(list)
+        for node in successors:
+            for _, _, successor in successors[node]:
+                predecessors[successor].append(node)
+        queue, queued = collections.deque(successors), set(successors)
+        while queue:
+            node = queue.popleft()
+            queued.discard(node)
+            if problem.isGoalState(node):
+                continue
+            value = min(stepCost + self.estimate(successor, problem) for _, stepCost, successor in successors[node])
+            if value > self.estimate(node, problem):
+                self.learned[node] = value
+                for predecessor in predecessors[node]:
+                    if predecessor in successors and predecessor not in queued:
+                        queue.append(predecessor)
+                        queued.add(predecessor)
+
+        # Dijkstra back from the goal over the transitions taken
+        into = collections.defaultdict(list)
+        for node, outgoing in self.transitions.items():
+            for successor, stepCost in outgoing.items():
+                into[successor].append((stepCost, node))
+        goal = problem.getStartState()
+        self.upper = {goal: 0}
+        fringe = util.PriorityQueue()
+        fringe.push(goal, 0)
+        while not fringe.isEmpty():
+            cost, node = fringe.peek()
+            fringe.pop()
+            if cost > self.upper[node]:
+                continue
+            for stepCost, predecessor in into[node]:
+                if cost + stepCost < self.upper.get(predecessor, float('inf')):
+                    self.upper[predecessor] = cost + stepCost
+                    fringe.push(predecessor, cost + stepCost)
+
+
+def checkTrials(layoutName, lookahead=20, trials=8):
+    """
+    Plays repeated games of a RealTimeSearchAgent on one layout and checks
+    that no trial takes more moves than the one before.
+
+    > python -c "import searchAgents; searchAgents.checkTrials('bigMaze')"
+    """
+    import io
+    import contextlib
+    import layout
+    import pacman
+    import textDisplay
+    agent = RealTimeSearchAgent(lookahead=lookahead)
+    moves = []
+    for trial in range(trials):
+        game = pacman.ClassicGameRules(30).newGame(layout.getLayout(layoutName), agent, [],
+                                                     textDisplay.NullGraphics(), True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.run()
+        moves.append(agent.moves)
+    print('%s, lookahead %d: moves per trial %s' % (layoutName, lookahead, moves))
+    assert all(later <= earlier for earlier, later in zip(moves, moves[1:])), 'a trial took more moves'
+    return moves
+
+
 def manhattanHeuristic(position, problem, info={}):
     "The Manhattan distance heuristic for a PositionSearchProblem"
     xy1 = position
@@ -274,6 +598,35 @@ def euclideanHeuristic(position, problem, info={}):
     return ((xy1[0] - xy2[0]) ** 2 + (xy1[1] - xy2[1]) ** 2) ** 0.5
 
 
+_landmarksOfWalls = {}     # id(walls) -> (walls, Landmarks)
+_landmarksByLayout = {}    # walls -> Landmarks, for equal walls in another Grid
+
+def layoutLandmarks(walls):
+    """
+    The Landmarks of a layout, computed once.  Every state of a game shares
+    the layout's walls Grid, so after the first call for a Grid they are
+    found by identity.
+    """
+    entry = _landmarksOfWalls.get(id(walls))
+    if entry is not None and entry[0] is walls:
+        return entry[1]
+    if walls not in _landmarksByLayout:
+        _landmarksByLayout[walls] = landmarks.Landmarks(walls)
+    _landmarksOfWalls[id(walls)] = (walls, _landmarksByLayout[walls])
+    return _landmarksByLayout[walls]
+
+def landmarkHeuristic(position, problem):
+    """
+    The ALT landmark heuristic for a PositionSearchProblem with unit step
+    costs (see landmarks.py).  Landmarks are computed once per layout and the
+    goal's landmark distances once per problem.
+    """
+    heuristic = getattr(problem, '_landmarkHeuristic', None)
+    if heuristic is None:
+        heuristic = problem._landmarkHeuristic = layoutLandmarks(problem.walls).heuristicTo(problem.goal)
+    return heuristic(position)
+
+
 #####################################################
 # This portion is incomplete.  Time to write code!  #
 #####################################################
@@ -462,14 +815,54 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+    def encodeState(self, state):
+        """
+        Pacman's position and one bit per dot of the starting food, as bytes
+        for search.ExternalBreadthFirstSearch.
+        """
+        if 'foodCells' not in dir(self):
+            self.foodCells = self.start[1].asList()
+        (x, y), food = state
+        bits = 0
+        for i, (foodX, foodY) in enumerate(self.foodCells):
+            if food[foodX][foodY]:
+                bits |= 1 << i
+        return bytes([x >> 8, x & 255, y >> 8, y & 255]) + bits.to_bytes((len(self.foodCells) + 7) // 8, 'big')
+
+    def decodeState(self, code):
+        if 'foodCells' not in dir(self):
+            self.foodCells = self.start[1].asList()
+        bits = int.from_bytes(code[4:], 'big')
+        food = self.start[1].copy()
+        for i, (foodX, foodY) in enumerate(self.foodCells):
+            food[foodX][foodY] = bool(bits >> i & 1)
+        return ((code[0] << 8 | code[1], code[2] << 8 | code[3]), food)
+
 
 class AStarFoodSearchAgent(SearchAgent):
-    "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
+    """
+    A SearchAgent for FoodSearchProblem using A* and your foodHeuristic
 
-    def __init__(self):
-        self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
+    With -a timeLimit=<seconds> it starts from the greedy closest-dot path
+    and runs anytime A* to improve it, returning the best path found within
+    the time limit.
+    """
+
+    def __init__(self, timeLimit=None):
+        if timeLimit is None:
+            self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
+        else:
+            self.timeLimit = float(timeLimit)
+            self.searchFunction = self.anytimeSearch
         self.searchType = FoodSearchProblem
 
+    def anytimeSearch(self, problem):
+        starttime = time.time()
+        greedy = ClosestDotSearchAgent()
+        greedy.registerInitialState(problem.startingGameState)
+        remaining = max(0.0, self.timeLimit - (time.time() - starttime))
+        return search.anytimeAStarSearch(problem, foodHeuristic, remaining, initialPath=greedy.actions)
+
 
 def foodHeuristic(state, problem):
     """
@@ -516,22 +909,33 @@ def foodHeuristic(state, problem):
 
 
 class ClosestDotSearchAgent(SearchAgent):
-    "Search for all food using a sequence of searches"
+    """
+    Search for all food using a sequence of searches
+
+    With -a timeLimit=<seconds> the greedy path is only the first solution:
+    anytime A* on the FoodSearchProblem then tries to shorten it until the
+    time limit, counted from the start of registerInitialState, runs out.
+    """
+
+    def __init__(self, timeLimit=None):
+        self.timeLimit = None if timeLimit is None else float(timeLimit)
 
     def registerInitialState(self, state):
-        self.actions = []
-        currentState = state
-        while (currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState)  # The missing piece
-            self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+        starttime = time.time()
+        # Plans on walls and positions only; gives the same path as calling
+        # findPathToClosestDot and replaying every segment on the GameState
+        planner = ClosestDotPlanner(state.getWalls())
+        self.actions = planner.plan(state.getPacmanPosition(), state.getFood().asList())
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
+        if self.timeLimit is not None:
+            problem = FoodSearchProblem(state)
+            remaining = max(0.0, self.timeLimit - (time.time() - starttime))
+            self.actions = search.anytimeAStarSearch(problem, foodHeuristic, remaining,
+                                                     initialPath=self.actions)
+            print('Anytime search improved it to cost %d in %.1f seconds' %
+                  (len(self.actions), time.time() - starttime))
+            print('Sub-optimality bound: %.2f' % problem._suboptimality)
 
     def findPathToClosestDot(self, gameState):
         """
@@ -547,6 +951,68 @@ class ClosestDotSearchAgent(SearchAgent):
         "*** YOUR CODE HERE ***"
         return search.uniformCostSearch(problem)
 
+class TourSearchAgent(SearchAgent):
+    """
+    Eats all the food along an approximate shortest tour (see tourPlanner.py).
+
+    A nearest-neighbour tour over the maze distances between dots is improved
+    with 2-opt and Or-opt moves for up to timeLimit seconds, which defaults to
+    one second: python pacman.py -l bigSearch -p TourSearchAgent -a timeLimit=2
+    """
+
+    def __init__(self, timeLimit=1.0):
+        self.timeLimit = float(timeLimit)
+
+    def registerInitialState(self, state):
+        starttime = time.time()
+        planner = tourPlanner.TourPlanner(state.getWalls(), state.getPacmanPosition(),
+                                          state.getFood().asList())
+        self.actions = planner.plan(self.timeLimit)
+        # the greedy tour is cheap to compute, so never do worse than it
+        greedy = ClosestDotPlanner(state.getWalls()).plan(state.getPacmanPosition(), state.getFood().asList())
+        if len(greedy) < len(self.actions):
+            self.actions = greedy
+        self.actionIndex = 0
+        print('Path found with cost %d in %.1f seconds' % (len(self.actions), time.time() - starttime))
+
+
+class ClosestDotPlanner:
+    """
+    Plans the greedy closest-dot tour of ClosestDotSearchAgent on the walls
+    alone, without search problems or GameState copies.
+
+    Each leg grows a search.GridDistanceField from Pacman's position a whole
+    level of the maze at a time, up to the first level holding a dot, and
+    takes the path uniformCostSearch would find on AnyFoodSearchProblem
+    from it, so the tour is the same.  The remaining dots are kept as one
+    bitboard for the whole tour, and eating one clears its bit.
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+
+    def plan(self, start, food):
+        """
+        Returns the actions that eat every reachable dot in food, always
+        heading for the closest remaining one.
+        """
+        height = self.walls.height
+        dots = 0
+        for x, y in food:
+            dots |= 1 << (x * height + y)
+        position, actions = start, []
+        while dots:
+            field = search.GridDistanceField(self.walls, [position], targetBits=dots)
+            path, dot = field.firstPathToTarget()
+            if path is None:
+                break
+            actions += path
+            # every cell passed on the way is nearer to Pacman, so only this dot is eaten
+            dots &= ~(1 << field.bit(dot))
+            position = dot
+        return actions
+
+
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
     A search problem for finding a path to any food.
@@ -583,6 +1049,9 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         "*** YOUR CODE HERE ***"
         return self.food[x][y] == True
 
+    def gridTargets(self):
+        return self.food.asList()
+
 
 def mazeDistance(point1, point2, gameState):
     """
@@ -599,5 +1068,6 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    # Repeated queries on the same layout share one hierarchical abstraction;
+    # in its default exact mode it answers with the breadth-first distance
+    return hierarchicalSearch.hierarchicalPathfinder(walls).distance(point1, point2)
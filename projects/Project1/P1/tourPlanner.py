@@ -0,0 +1,214 @@
+# tourPlanner.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Approximate tours for eating all the food on layouts far too large for an
+optimal FoodSearchProblem search.
+
+The planner treats the food as an open travelling-salesman tour that starts
+at Pacman:
+
+  1. MazeDistances runs one breadth-first search from Pacman and from every
+     dot, giving exact maze distances between them plus the search trees
+     needed to turn the tour back into actions.
+  2. A nearest-neighbour tour is built from those distances.
+  3. 2-opt (reversing a stretch of the tour) and Or-opt (moving a run of up
+     to three dots elsewhere) improve it until no move helps or the time
+     budget is spent.
+  4. The tour is expanded into actions along the cached shortest paths,
+     skipping dots that were already eaten on the way to earlier ones.
+
+Run this file to compare the tour planner with ClosestDotSearchAgent on all
+the *Search layouts:
+
+> python tourPlanner.py
+"""
+
+import collections
+import time
+
+from game import Actions
+from game import Directions
+
+
+class MazeDistances:
+    """
+    Exact maze distances from a set of source cells to every cell, with the
+    breadth-first search tree of each source for path reconstruction.
+    """
+
+    def __init__(self, walls, sources):
+        self.walls = walls
+        self.distances = {}
+        self.parents = {}
+        for source in sources:
+            if source not in self.distances:
+                self.search(source)
+
+    def search(self, source):
+        distances, parents = {source: 0}, {source: None}
+        frontier = collections.deque([source])
+        while frontier:
+            x, y = cell = frontier.popleft()
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                neighbour = int(x + dx), int(y + dy)
+                if neighbour not in distances and not self.walls[neighbour[0]][neighbour[1]]:
+                    distances[neighbour] = distances[cell] + 1
+                    parents[neighbour] = (cell, action)
+                    frontier.append(neighbour)
+        self.distances[source] = distances
+        self.parents[source] = parents
+
+    def distance(self, source, target):
+        return self.distances[source].get(target, float('inf'))
+
+    def cellsOnPath(self, source, target):
+        "The (action, cell) steps of a shortest path from source to target"
+        parents, steps = self.parents[source], []
+        cell = target
+        while parents[cell] is not None:
+            previous, action = parents[cell]
+            steps.append((action, cell))
+            cell = previous
+        steps.reverse()
+        return steps
+
+
+class TourPlanner:
+    """
+    Plans a short open tour from start through every reachable dot.
+    """
+
+    def __init__(self, walls, start, food):
+        self.start = start
+        self.oracle = MazeDistances(walls, [start] + list(food))
+        reachable = self.oracle.distances[start]
+        self.food = [dot for dot in food if dot in reachable]
+
+    def tourLength(self, tour):
+        stops = [self.start] + tour
+        return sum(self.oracle.distance(a, b) for a, b in zip(stops, stops[1:]))
+
+    def nearestNeighbourTour(self):
+        remaining = set(self.food)
+        position, tour = self.start, []
+        while remaining:
+            distances = self.oracle.distances[position]
+            position = min(remaining, key=lambda dot: (distances[dot], dot))
+            remaining.remove(position)
+            tour.append(position)
+        return tour
+
+    def improve(self, tour, deadline):
+        """
+        Applies improving 2-opt and Or-opt moves until neither finds one or
+        the deadline passes.  The start of the tour stays fixed.
+        """
+        while time.time() < deadline:
+            if not (self.twoOpt(tour, deadline) or self.orOpt(tour, deadline)):
+                break
+        return tour
+
+    def twoOpt(self, tour, deadline):
+        "Reverses the first stretch tour[i..j] whose reversal shortens the tour"
+        distance = self.oracle.distance
+        stops = [self.start] + tour
+        n = len(stops)
+        for i in range(1, n - 1):
+            if time.time() > deadline:
+                return False
+            a, b = stops[i - 1], stops[i]
+            removedAB = distance(a, b)
+            for j in range(i + 1, n):
+                c = stops[j]
+                d = stops[j + 1] if j + 1 < n else None
+                removed = removedAB + (distance(c, d) if d is not None else 0)
+                added = distance(a, c) + (distance(b, d) if d is not None else 0)
+                if added < removed:
+                    tour[i - 1:j] = reversed(tour[i - 1:j])
+                    return True
+        return False
+
+    def orOpt(self, tour, deadline):
+        "Moves the first run of one to three dots whose move shortens the tour"
+        distance = self.oracle.distance
+        for length in (1, 2, 3):
+            for i in range(len(tour) - length + 1):
+                if time.time() > deadline:
+                    return False
+                stops = [self.start] + tour
+                # the run is stops[i + 1 .. i + length]
+                before, first, last = stops[i], stops[i + 1], stops[i + length]
+                after = stops[i + length + 1] if i + length + 1 < len(stops) else None
+                gain = distance(before, first) + (distance(last, after) - distance(before, after)
+                                                  if after is not None else 0)
+                run = tour[i:i + length]
+                rest = tour[:i] + tour[i + length:]
+                restStops = [self.start] + rest
+                for k in range(len(restStops)):
+                    p = restStops[k]
+                    q = restStops[k + 1] if k + 1 < len(restStops) else None
+                    for segment in (run, run[::-1]):
+                        cost = distance(p, segment[0]) + (distance(segment[-1], q) - distance(p, q)
+                                                          if q is not None else 0)
+                        if cost < gain:
+                            tour[:] = rest[:k] + segment + rest[k:]
+                            return True
+        return False
+
+    def actionsFor(self, tour):
+        """
+        Turns a tour into actions along shortest paths, skipping dots that
+        were eaten while walking to earlier ones.
+        """
+        eaten, actions = set(), []
+        position = self.start
+        for dot in tour:
+            if dot in eaten:
+                continue
+            for action, cell in self.oracle.cellsOnPath(position, dot):
+                actions.append(action)
+                eaten.add(cell)
+            position = dot
+        return actions
+
+    def plan(self, timeLimit=1.0):
+        "Returns the actions of the best tour found within timeLimit seconds"
+        deadline = time.time() + timeLimit
+        tour = self.improve(self.nearestNeighbourTour(), deadline)
+        return self.actionsFor(tour)
+
+
+if __name__ == '__main__':
+    import contextlib
+    import io
+    import os
+
+    import layout
+    import pacman
+    import searchAgents
+
+    names = sorted(name[:-4] for name in os.listdir('layouts') if name.endswith('Search.lay'))
+    print('%-18s %12s %10s %12s %10s' % ('layout', 'closest dot', 'time', 'tour', 'time'))
+    for name in names:
+        state = pacman.GameState()
+        state.initialize(layout.getLayout(name), 0)
+        results = []
+        for agent in [searchAgents.ClosestDotSearchAgent(), searchAgents.TourSearchAgent()]:
+            start = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent.registerInitialState(state)
+            results += [len(agent.actions), time.time() - start]
+        print('%-18s %12d %9.3fs %12d %9.3fs' % tuple([name] + results))
@@ -1,6 +1,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 
 
 class FixedRandom:
@@ -119,6 +120,9 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
@@ -139,6 +143,9 @@ class Queue:
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
@@ -159,9 +166,17 @@ class PriorityQueue:
         (_, _, item) = heapq.heappop(self.heap)
         return item
 
+    def peek(self):
+        "The (priority, item) pair that pop would return next, left in the queue"
+        (priority, _, item) = self.heap[0]
+        return priority, item
+
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -193,6 +208,88 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class BucketQueue:
+    """
+      A bucket (Dial's algorithm) priority queue for integer priorities.
+
+      buckets[i] is a FIFO list of the items of priority base + i, and a
+      cursor marks the first bucket that may still hold items.  Uniform cost
+      search, and A* with a consistent heuristic, never push below the
+      priority they last popped, so the cursor only moves forward: push and
+      pop are O(1), plus one step per empty bucket skipped.  A smaller
+      priority (an inconsistent heuristic) moves the cursor back, which
+      stays correct.
+
+      Ties are broken in insertion order, exactly like PriorityQueue, so a
+      search gets the same answer whichever queue it uses.
+
+      push raises ValueError for a priority it cannot bucket: one that is
+      not a whole number away from the first priority pushed, or one more
+      than maxSpan away from the lowest (e.g. the exponential step costs of
+      StayWestSearchAgent).
+      toPriorityQueue then hands the contents over to an ordinary heap.
+    """
+    def  __init__(self, maxSpan=1 << 16):
+        self.buckets = []
+        self.base = None
+        self.cursor = 0
+        self.size = 0
+        self.maxSpan = maxSpan
+
+    def push(self, item, priority):
+        base = priority if self.base is None else self.base
+        index = priority - base
+        if abs(index) > self.maxSpan or index % 1 != 0:
+            raise ValueError('BucketQueue cannot hold priority %r' % (priority,))
+        index = int(index)
+        buckets = self.buckets
+        if index < 0:
+            buckets[:0] = [collections.deque() for _ in range(-index)]
+            self.cursor -= index
+            base, index = priority, 0
+        self.base = base
+        while len(buckets) <= index:
+            buckets.append(collections.deque())
+        buckets[index].append(item)
+        if index < self.cursor:
+            self.cursor = index
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        cursor = self.cursor
+        while not buckets[cursor]:
+            cursor += 1
+        self.cursor = cursor
+        self.size -= 1
+        return buckets[cursor].popleft()
+
+    def peek(self):
+        "The (priority, item) pair that pop would return next, left in the queue"
+        buckets = self.buckets
+        while not buckets[self.cursor]:
+            self.cursor += 1
+        return self.base + self.cursor, buckets[self.cursor][0]
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        "The (priority, item) pairs still queued, in the order they would be popped"
+        for index in range(self.cursor, len(self.buckets)):
+            for item in self.buckets[index]:
+                yield self.base + index, item
+
+    def toPriorityQueue(self):
+        "A PriorityQueue holding the same items, popping them in the same order"
+        queue = PriorityQueue()
+        for priority, item in self.items():
+            queue.push(item, priority)
+        return queue
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
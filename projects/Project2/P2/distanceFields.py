@@ -0,0 +1,263 @@
+# distanceFields.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Per-layout maze distance fields for evaluation functions.
+
+A field is a flat array with one entry per cell, indexed x * height + y, so
+a feature of a leaf is a single lookup:
+
+  fields.fieldFrom(cell)   maze distances from a cell, for capsules and
+                           ghosts; computed on first use and kept
+  fields.deadEndDepth      how many steps a cell lies inside a dead end
+  fields.nearestFood(food) the distance to the nearest food, kept for each
+                           food set seen; a new food set is built by a
+                           NearestFoodField that repairs only the cells the
+                           eaten dots affected
+
+distanceFields(walls) builds the fields of a layout once; they are never
+shared between layouts.
+"""
+
+import array
+import collections
+import heapq
+
+from game import Actions
+from game import Directions
+
+UNREACHABLE = 1 << 20
+
+
+class DistanceFields:
+    """
+    The static fields of one walls Grid.
+    """
+
+    def __init__(self, walls, maxFoodFields=4096):
+        self.walls = walls
+        self.width, self.height = walls.width, walls.height
+        self.numCells = self.width * self.height
+        self.neighbours = [()] * self.numCells
+        for x in range(self.width):
+            for y in range(self.height):
+                if walls[x][y]:
+                    continue
+                cells = []
+                for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not walls[nextx][nexty]:
+                        cells.append(nextx * self.height + nexty)
+                self.neighbours[x * self.height + y] = tuple(cells)
+        self.fields = {}
+        self.deadEndDepth = self.computeDeadEndDepth()
+        self.foodField = None
+        self.maxFoodFields = maxFoodFields
+        self.foodFields = {}    # food set, as a tuple of columns -> distances
+        self.frozenFood = {}    # id(food.data) -> (food.data, distances)
+
+    def index(self, position):
+        "The cell of a position; ghosts between two cells count as the nearest one"
+        x, y = position
+        return int(x + 0.5) * self.height + int(y + 0.5)
+
+    def bfs(self, sources):
+        distances = array.array('i', [UNREACHABLE]) * self.numCells
+        for source in sources:
+            distances[source] = 0
+        frontier = collections.deque(sources)
+        neighbours = self.neighbours
+        while frontier:
+            cell = frontier.popleft()
+            nextDistance = distances[cell] + 1
+            for neighbour in neighbours[cell]:
+                if distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = nextDistance
+                    frontier.append(neighbour)
+        return distances
+
+    def fieldFrom(self, position):
+        "The maze distance from position to every cell, UNREACHABLE for walls"
+        source = self.index(position)
+        if source not in self.fields:
+            self.fields[source] = self.bfs([source])
+        return self.fields[source]
+
+    def distance(self, a, b):
+        return self.fieldFrom(a)[self.index(b)]
+
+    def nearestFood(self, food, frozen=False):
+        """
+        The maze distance from every cell to the nearest food of a Grid.
+        Each food set is computed once and then found by its contents.
+        frozen says the Grid's data is never changed in place, as for a
+        GameState, whose successors share it until a dot is eaten; its
+        field is then found by the identity of that data, without reading
+        the grid at all.
+        """
+        if frozen:
+            entry = self.frozenFood.get(id(food.data))
+            if entry is not None and entry[0] is food.data:
+                return entry[1]
+        key = tuple(map(tuple, food.data))
+        distances = self.foodFields.get(key)
+        if distances is None:
+            if self.foodField is None:
+                self.foodField = NearestFoodField(self, food)
+            else:
+                self.foodField.update(food)
+            distances = self.foodField.distances[:]
+            remember(self.foodFields, key, distances, self.maxFoodFields)
+        if frozen:
+            remember(self.frozenFood, id(food.data), (food.data, distances), self.maxFoodFields)
+        return distances
+
+    def computeDeadEndDepth(self):
+        """
+        Peels dead ends off the maze one cell at a time.  A peeled cell's
+        depth is one more than that of the cell it hangs from, so the mouth
+        of a dead end has depth 1 and its tip the largest depth; cells on a
+        cycle keep depth 0.
+        """
+        degree = [len(cells) for cells in self.neighbours]
+        peeled = [False] * self.numCells
+        parent = [None] * self.numCells
+        order = []
+        stack = [cell for cell in range(self.numCells) if degree[cell] == 1]
+        while stack:
+            cell = stack.pop()
+            if peeled[cell]:
+                continue
+            peeled[cell] = True
+            order.append(cell)
+            for neighbour in self.neighbours[cell]:
+                if not peeled[neighbour]:
+                    parent[cell] = neighbour
+                    degree[neighbour] -= 1
+                    if degree[neighbour] == 1:
+                        stack.append(neighbour)
+        depth = array.array('i', [0]) * self.numCells
+        for cell in reversed(order):
+            if parent[cell] is not None:
+                depth[cell] = depth[parent[cell]] + 1
+        return depth
+
+
+class NearestFoodField:
+    """
+    The maze distance from every cell to the nearest food dot.
+
+    update(food) compares the food Grid with the one the field was last
+    computed for.  An eaten dot only invalidates the cells whose distance
+    was measured from it, which are found by walking outwards from the dot
+    while the distance grows by one per step; those are cleared and filled
+    in again from their neighbours.  A dot that comes back lowers the field
+    with a search from it.
+    """
+
+    def __init__(self, fields, food):
+        self.fields = fields
+        self.food = [column[:] for column in food.data]
+        self.distances = fields.bfs([x * fields.height + y for x, y in food.asList()])
+        self.repaired = 0
+
+    def update(self, food):
+        "Brings the field up to date with a food Grid"
+        if food.data == self.food:
+            return
+        height = self.fields.height
+        eaten, added = [], []
+        for x, (column, old) in enumerate(zip(food.data, self.food)):
+            if column != old:
+                for y in range(height):
+                    if column[y] != old[y]:
+                        (added if column[y] else eaten).append(x * height + y)
+                self.food[x] = column[:]
+        if eaten:
+            self.removeSources(eaten)
+        if added:
+            self.addSources(added)
+
+    def removeSources(self, cells):
+        distances, neighbours = self.distances, self.fields.neighbours
+        invalid = set(cells)
+        frontier = list(cells)
+        while frontier:
+            cell = frontier.pop()
+            for neighbour in neighbours[cell]:
+                if neighbour not in invalid and distances[neighbour] == distances[cell] + 1:
+                    invalid.add(neighbour)
+                    frontier.append(neighbour)
+        self.repaired += len(invalid)
+        fringe = []
+        for cell in invalid:
+            distances[cell] = UNREACHABLE
+        for cell in invalid:
+            for neighbour in neighbours[cell]:
+                if neighbour not in invalid and distances[neighbour] < UNREACHABLE:
+                    fringe.append((distances[neighbour] + 1, cell))
+        heapq.heapify(fringe)
+        while fringe:
+            distance, cell = heapq.heappop(fringe)
+            if distance >= distances[cell]:
+                continue
+            distances[cell] = distance
+            for neighbour in neighbours[cell]:
+                if distance + 1 < distances[neighbour]:
+                    heapq.heappush(fringe, (distance + 1, neighbour))
+
+    def addSources(self, cells):
+        distances, neighbours = self.distances, self.fields.neighbours
+        frontier = collections.deque()
+        for cell in cells:
+            distances[cell] = 0
+            frontier.append(cell)
+        while frontier:
+            cell = frontier.popleft()
+            nextDistance = distances[cell] + 1
+            for neighbour in neighbours[cell]:
+                if nextDistance < distances[neighbour]:
+                    distances[neighbour] = nextDistance
+                    frontier.append(neighbour)
+
+    def distanceFrom(self, position):
+        "The maze distance from position to the nearest food, UNREACHABLE if there is none"
+        return self.distances[self.fields.index(position)]
+
+
+def remember(cache, key, value, maxEntries):
+    "Stores into a dictionary, dropping its oldest entry once it is full"
+    if len(cache) >= maxEntries:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+_distanceFields = {}    # str(walls) -> DistanceFields
+_fieldsOfWalls = {}     # id(walls) -> (walls, DistanceFields)
+
+def distanceFields(walls):
+    """
+    The DistanceFields of a layout, built on first use.  Every state of a
+    game shares the layout's walls Grid, so after the first call for a Grid
+    its fields are found by identity.
+    """
+    entry = _fieldsOfWalls.get(id(walls))
+    if entry is not None and entry[0] is walls:
+        return entry[1]
+    key = str(walls)
+    if key not in _distanceFields:
+        _distanceFields[key] = DistanceFields(walls)
+    _fieldsOfWalls[id(walls)] = (walls, _distanceFields[key])
+    return _distanceFields[key]
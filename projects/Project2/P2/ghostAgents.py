@@ -20,26 +20,83 @@ from util import manhattanDistance
 import util
 
 
+class DistributionCache:
+    """
+    A bounded cache of ghost action distributions, shared by all ghosts.
+    Entries are only valid for one layout, so the cache empties itself
+    when it is asked about the walls of another one, and it drops its
+    oldest entries once it holds maxEntries.
+    """
+
+    def __init__(self, maxEntries=100000):
+        self.maxEntries = maxEntries
+        self.walls = None
+        self.entries = {}
+        self.hits = self.misses = 0
+
+    def lookup(self, state, key, compute):
+        walls = state.getWalls()
+        if walls is not self.walls:
+            if self.walls is None or walls != self.walls:
+                self.entries.clear()
+            self.walls = walls
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        if len(self.entries) >= self.maxEntries:
+            del self.entries[next(iter(self.entries))]
+        value = self.entries[key] = compute()
+        return value
+
+
+ghostDistributions = DistributionCache()
+
+
 class GhostAgent(Agent):
     def __init__(self, index):
         self.index = index
 
     def getAction(self, state):
-        dist = self.getDistribution(state)
+        dist = self.getActionDistribution(state)
         if len(dist) == 0:
             return Directions.STOP
         else:
-            return util.chooseFromDistribution(dist)
+            # sampled exactly as util.chooseFromDistribution samples a Counter
+            items = sorted(dist)
+            return util.sample([prob for _, prob in items], [action for action, _ in items])
 
     def getDistribution(self, state):
         "Returns a Counter encoding a distribution over actions from the provided state."
         util.raiseNotDefined()
 
+    def getActionDistribution(self, state):
+        """
+        The distribution of getDistribution as an immutable tuple of (action,
+        probability) pairs.  Ghosts that give a distributionKey compute it
+        with computeDistribution and keep it in ghostDistributions.
+        """
+        key = self.distributionKey(state)
+        if key is None:
+            return tuple(self.getDistribution(state).items())
+        return ghostDistributions.lookup(state, key, lambda: tuple(self.computeDistribution(state).items()))
+
+    def distributionKey(self, state):
+        "Everything about the state that the distribution depends on, or None not to cache it"
+        return None
+
 
 class RandomGhost(GhostAgent):
     "A ghost that chooses a legal action uniformly at random."
 
+    def distributionKey(self, state):
+        configuration = state.getGhostState(self.index).configuration
+        return ('random', configuration.pos, configuration.direction, state.isWin() or state.isLose())
+
     def getDistribution(self, state):
+        return util.Counter(self.getActionDistribution(state))
+
+    def computeDistribution(self, state):
         dist = util.Counter()
         for a in state.getLegalActions(self.index):
             dist[a] = 1.0
@@ -55,7 +112,16 @@ class DirectionalGhost(GhostAgent):
         self.prob_attack = prob_attack
         self.prob_scaredFlee = prob_scaredFlee
 
+    def distributionKey(self, state):
+        ghostState = state.getGhostState(self.index)
+        configuration = ghostState.configuration
+        return ('directional', self.prob_attack, self.prob_scaredFlee, configuration.pos, configuration.direction,
+                state.getPacmanPosition(), ghostState.scaredTimer > 0, state.isWin() or state.isLose())
+
     def getDistribution(self, state):
+        return util.Counter(self.getActionDistribution(state))
+
+    def computeDistribution(self, state):
         # Read variables from state
         ghostState = state.getGhostState(self.index)
         legalActions = state.getLegalActions(self.index)
@@ -1,8 +1,13 @@
 from util import manhattanDistance
 from game import Directions
+import math
 import random, util
+import multiprocessing
+import time
 
 from game import Agent
+from pacman import SearchState
+import distanceFields
 
 
 class ReflexAgent(Agent):
@@ -92,6 +97,248 @@ def scoreEvaluationFunction(currentGameState):
     return currentGameState.getScore()
 
 
+# evaluation function -> bounds function, see declareEvaluationBounds
+evaluationBounds = {}
+
+def declareEvaluationBounds(evalFn, boundsFn):
+    """
+    Declares that boundsFn(state, moves) returns (lower, upper) bounds on
+    evalFn over the states where the game ends, or Pacman has made moves
+    more moves, starting from state; every ghost makes at most one move more
+    than Pacman.  This lets StarExpectimaxAgent prune with evalFn.
+    """
+    evaluationBounds[evalFn] = boundsFn
+
+def scoreBounds(state, moves):
+    """
+    (lower, upper) bounds on the score after Pacman's next moves moves, or
+    when the game ends before them.  Pacman loses a point every move; only
+    food within moves steps of maze distance can be eaten, for 10 points
+    each, and 500 more if that is all of it; a ghost can be eaten, for 200,
+    if it is already scared and close, and once more for every capsule in
+    reach.  Losing costs 500 for every ghost that meets Pacman, and only a
+    ghost within 2 * moves + 2 steps of him can, or one whose start is, if
+    it may be eaten and sent back there first.
+    """
+    score, position = state.getScore(), state.getPacmanPosition()
+    fields = distanceFields.distanceFields(state.getWalls())
+    distances, index = fields.fieldFrom(position), fields.index
+    foodList = state.getFood().asList()
+    reachable = len([1 for food in foodList if distances[index(food)] <= moves])
+    upper = score - moves + 10 * min(moves, reachable)
+    if reachable == len(foodList) and reachable <= moves:
+        # eating the last dot ends the game before the other moves
+        upper = max(upper, score + 9 * reachable + 500)
+    ghostStates = state.getGhostStates()
+    # one more step for a ghost between two cells, counted at the nearer one
+    contact = 2 * moves + 2
+    capsules = len([1 for capsule in state.getCapsules() if distances[index(capsule)] <= moves])
+    upper += 200 * (len(ghostStates) * capsules +
+                    len([1 for ghost in ghostStates if ghost.scaredTimer > 0 and
+                         distances[index(ghost.getPosition())] <= contact]))
+    # ghosts meeting Pacman on the same move cost 500 each
+    lower = score - moves - 500 * len([1 for ghost in ghostStates if
+                                       distances[index(ghost.getPosition())] <= contact or
+                                       (capsules or ghost.scaredTimer > 0) and
+                                       distances[index(ghost.start.getPosition())] <= contact])
+    return lower, upper
+
+declareEvaluationBounds(scoreEvaluationFunction, scoreBounds)
+
+
+class TranspositionTable:
+    """
+    A fixed-size table of search results, shared by all the searches of one
+    agent so that positions reached again, in the same search through a
+    different move order or in the search for a later move, are not searched
+    twice.
+
+    Every bucket has two slots.  The depth-preferred slot keeps the entry
+    searched deepest and is only overwritten by an entry at least as deep or
+    when its entry is left over from an earlier move; everything else goes
+    into the always-replace slot.  An entry is (key, depth, value, bound,
+    move, generation), where bound says whether value is EXACT or only a
+    LOWER or UPPER bound on the true value.
+    """
+
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, size):
+        self.size = size
+        self.deep = [None] * size
+        self.recent = [None] * size
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.replaced = 0
+
+    def newSearch(self):
+        self.generation += 1
+
+    def probe(self, key):
+        self.probes += 1
+        bucket = hash(key) % self.size
+        for entry in (self.deep[bucket], self.recent[bucket]):
+            if entry is not None and entry[0] == key:
+                return entry
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        self.stores += 1
+        bucket = hash(key) % self.size
+        entry = (key, depth, value, bound, move, self.generation)
+        old = self.deep[bucket]
+        if old is None or old[0] == key or depth >= old[1] or old[5] != self.generation:
+            if old is not None and old[0] != key:
+                self.replaced += 1
+            self.deep[bucket] = entry
+        else:
+            if self.recent[bucket] is not None and self.recent[bucket][0] != key:
+                self.replaced += 1
+            self.recent[bucket] = entry
+
+    def hitRate(self):
+        return self.hits / float(self.probes) if self.probes else 0.0
+
+
+_zobristTables = {}
+
+def zobristTable(width, height):
+    """
+    Random 64-bit numbers for every cell of a layout, one table for food and
+    one for capsules.  A private generator keeps the game's random moves
+    unchanged.
+    """
+    if (width, height) not in _zobristTables:
+        generator = random.Random(width * 1000 + height)
+        _zobristTables[width, height] = [[[generator.getrandbits(64) for y in range(height)] for x in range(width)]
+                                         for table in range(2)]
+    return _zobristTables[width, height]
+
+
+def _searchCounters(agent):
+    "The node and table counters that a worker reports back to the agent"
+    table = agent.table
+    if table is None:
+        return (agent.nodes, 0, 0, 0, 0)
+    return (agent.nodes, table.probes, table.hits, table.stores, table.replaced)
+
+
+def _rootSplitWorker(agent, commands, tasks, results, sharedAlpha, alphaLock):
+    """
+    Body of one RootSplitPool worker, a forked copy of the agent.  For every
+    move it receives the state once, then evaluates root actions from the
+    shared task queue until it reads the end-of-move marker, which it
+    acknowledges with the CPU time it spent searching.
+    """
+    agent.pool, agent.sharedAlpha = None, sharedAlpha
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        move, gameState = command
+        actions = gameState.getLegalActions(0)
+        foodKey = agent.foodKey(gameState)
+        agent.startSearch()
+        started = time.process_time()
+        while True:
+            task = tasks.get()
+            if task is None:
+                results.put((None, time.process_time() - started, None))
+                break
+            before = _searchCounters(agent)
+            value = agent.rootChildValue(gameState, actions[task], sharedAlpha.value, foodKey)
+            with alphaLock:
+                if value > sharedAlpha.value:
+                    sharedAlpha.value = value
+            results.put((task, value, [a - b for a, b in zip(_searchCounters(agent), before)]))
+
+
+class RootSplitPool:
+    """
+    Worker processes that evaluate the root actions of a search in parallel.
+
+    The workers are forked once, on the first move, and live as long as the
+    agent.  For every move each worker is sent the GameState once, and the
+    root actions are handed out one at a time from a shared queue.  The best
+    root value found so far is kept in shared memory: alpha-beta workers
+    read it as alpha whenever they enter a ghost node, so a subtree pruned
+    by one worker's result is pruned in all of them.  Since pruning is
+    strict, the chosen action is the same as in the serial search.
+
+    The root of a Pacman search has at most five actions, so that caps the
+    speedup whatever the number of workers.  Each worker reports the CPU
+    time it searched for every move; the time of the busiest worker is the
+    time the move takes when every worker has a core of its own, which
+    report() compares with the total.
+    """
+
+    @staticmethod
+    def available():
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    def __init__(self, agent, numWorkers):
+        context = multiprocessing.get_context('fork')
+        self.commands = [context.Queue() for _ in range(numWorkers)]
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.sharedAlpha = context.RawValue('d', -float("inf"))
+        self.alphaLock = context.Lock()
+        self.move = 0
+        self.searchTime = self.busiestTime = 0.0
+        self.processes = [context.Process(target=_rootSplitWorker,
+                                          args=(agent, commands, self.tasks, self.results,
+                                                self.sharedAlpha, self.alphaLock))
+                          for commands in self.commands]
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+        self.agent = agent
+
+    def rootValues(self, gameState, actions):
+        self.move += 1
+        self.sharedAlpha.value = -float("inf")
+        for commands in self.commands:
+            commands.put((self.move, gameState))
+        for task in range(len(actions)):
+            self.tasks.put(task)
+        for _ in self.commands:
+            self.tasks.put(None)
+        # every worker also reports reading its end-of-move marker, so no
+        # marker is left on the queue to be read during the next move
+        values = [None] * len(actions)
+        busiest = 0.0
+        for _ in range(len(actions) + len(self.commands)):
+            task, value, counters = self.results.get()
+            if task is not None:
+                values[task] = value
+                self.addCounters(counters)
+            else:
+                self.searchTime += value
+                busiest = max(busiest, value)
+        self.busiestTime += busiest
+        return values
+
+    def addCounters(self, counters):
+        agent = self.agent
+        agent.nodes += counters[0]
+        if agent.table is not None:
+            table = agent.table
+            table.probes += counters[1]
+            table.hits += counters[2]
+            table.stores += counters[3]
+            table.replaced += counters[4]
+
+    def report(self):
+        return ('%d workers: %.2fs of search, %.2fs on the busiest worker of each move (%.2fx)' %
+                (len(self.processes), self.searchTime, self.busiestTime,
+                 self.searchTime / self.busiestTime if self.busiestTime > 0 else 1.0))
+
+    def close(self):
+        for commands in self.commands:
+            commands.put(None)
+        for process in self.processes:
+            process.join()
+
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -105,12 +352,119 @@ class MultiAgentSearchAgent(Agent):
     Note: this is an abstract class: one that should not be instantiated.  It's
     only partially specified, and designed to be extended.  Agent (game.py)
     is another abstract class.
+
+    With tableSize above 0 the searches share a TranspositionTable of that
+    many buckets, for example
+
+    > python pacman.py -p AlphaBetaAgent -a depth=3,tableSize=100000
+
+    and with workers above 1 the root actions are searched in that many
+    processes (see RootSplitPool), each with its own copy of the table
+
+    > python pacman.py -p AlphaBetaAgent -a depth=4,workers=4
     """
 
-    def __init__(self, evalFn='scoreEvaluationFunction', depth='2'):
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', tableSize='0', workers='1'):
         self.index = 0  # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        self.table = TranspositionTable(int(tableSize)) if int(tableSize) > 0 else None
+        self.nodes = 0
+        self.workers = int(workers)
+        self.pool = None
+        self.sharedAlpha = None
+
+    def rootValues(self, gameState, actions):
+        """
+        The value of each root action, one after another or, with workers
+        above 1, split over a RootSplitPool.  Each value comes from
+        rootChildValue(gameState, action, alpha, foodKey), where alpha is the
+        best value found so far (only alpha-beta uses it).
+        """
+        self.startSearch()
+        if self.workers > 1 and len(actions) > 1 and RootSplitPool.available():
+            if self.pool is None:
+                self.pool = RootSplitPool(self, self.workers)
+            return self.pool.rootValues(gameState, actions)
+        foodKey = self.foodKey(gameState)
+        alpha = -float("inf")
+        values = []
+        for each in actions:
+            values.append(self.rootChildValue(gameState, each, alpha, foodKey))
+            alpha = max(alpha, max(values))
+        return values
+
+    def foodKey(self, state):
+        "XOR of the Zobrist numbers of the remaining food and capsules"
+        if self.table is None:
+            return None
+        food = state.getFood()
+        foodTable, capsuleTable = zobristTable(food.width, food.height)
+        key = 0
+        for x, y in food.asList():
+            key ^= foodTable[x][y]
+        for x, y in state.getCapsules():
+            key ^= capsuleTable[x][y]
+        return key
+
+    def childFoodKey(self, foodKey, successor):
+        "The food key of a successor, updated for what its move ate"
+        if foodKey is None:
+            return None
+        foodTable, capsuleTable = zobristTable(successor.data.layout.width, successor.data.layout.height)
+        if successor.data._foodEaten is not None:
+            x, y = successor.data._foodEaten
+            foodKey ^= foodTable[x][y]
+        if successor.data._capsuleEaten is not None:
+            x, y = successor.data._capsuleEaten
+            foodKey ^= capsuleTable[x][y]
+        return foodKey
+
+    def probe(self, state, foodKey, index):
+        """
+        Returns (key, entry) for a node; entry is None on a miss and both are
+        None without a table.  Pacman's direction is left out of the key since
+        it never restricts his moves, so the same position reached by
+        different moves shares an entry.
+        """
+        self.nodes += 1
+        if self.table is None:
+            return None, None
+        agents = state.agentStates if isinstance(state, SearchState) else state.data.agentStates
+        key = (foodKey, index, state.getScore(), agents[0].configuration.pos,
+               tuple((ghost.configuration.pos, ghost.configuration.direction, ghost.scaredTimer)
+                     for ghost in agents[1:]))
+        return key, self.table.probe(key)
+
+    def store(self, key, depth, value, bound, move):
+        if key is not None:
+            self.table.store(key, depth, value, bound, move)
+
+    def ordered(self, actions, entry):
+        "Tries the best move remembered for a node first"
+        if entry is None or entry[4] not in actions:
+            return actions
+        return [entry[4]] + [action for action in actions if action != entry[4]]
+
+    def startSearch(self):
+        if self.table is not None:
+            self.table.newSearch()
+
+    def final(self, state):
+        """
+        Reports the nodes searched and the use of the table and the workers
+        over the game, and shuts the workers down
+        """
+        if self.pool is not None:
+            print('[%s] %s' % (self.__class__.__name__, self.pool.report()))
+            self.pool.close()
+            self.pool = None
+        if self.table is not None:
+            table = self.table
+            print('[%s] %d nodes searched, %d probes, %.0f%% hits, %d stores, %d replaced' %
+                  (self.__class__.__name__, self.nodes, table.probes, 100 * table.hitRate(),
+                   table.stores, table.replaced))
+            self.nodes = table.probes = table.hits = table.stores = table.replaced = 0
 
 
 class MinimaxAgent(MultiAgentSearchAgent):
@@ -142,30 +496,49 @@ class MinimaxAgent(MultiAgentSearchAgent):
         Returns whether or not the game state is a losing state
         """
         "*** YOUR CODE HERE ***"
-
-        def max_value(state, depth, index):
-            if state.isWin() or state.isLose() or depth == 0:
-                return self.evaluationFunction(state)
-            v = -float("inf")
-            for each in state.getLegalActions(index):
-                v = max(v, min_value(state.generateSuccessor(index, each), depth, index + 1))
-            return v
-
-        def min_value(state, depth, index):
-            if state.isWin() or state.isLose() or depth == 0:
-                return self.evaluationFunction(state)
-            v = float("inf")
-            for each in state.getLegalActions(index):
-                if index == gameState.getNumAgents() - 1:
-                    v = min(v, max_value(state.generateSuccessor(index, each), depth - 1, 0))
-                else:
-                    v = min(v, min_value(state.generateSuccessor(index, each), depth, index + 1))
-            return v
-
         actions = gameState.getLegalActions(0)
-        value = [min_value(gameState.generateSuccessor(0, each), self.depth, 1) for each in actions]
+        value = self.rootValues(gameState, actions)
         return actions[value.index(max(value))]
 
+    def rootChildValue(self, gameState, action, alpha, foodKey):
+        successor = gameState.generateSuccessor(0, action)
+        return self.min_value(successor, self.depth, 1, self.childFoodKey(foodKey, successor))
+
+    def max_value(self, state, depth, index, foodKey):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        key, entry = self.probe(state, foodKey, index)
+        if entry is not None and entry[1] >= depth:
+            self.table.hits += 1
+            return entry[2]
+        v, best = -float("inf"), None
+        for each in state.getLegalActions(index):
+            successor = state.generateSuccessor(index, each)
+            child = self.min_value(successor, depth, index + 1, self.childFoodKey(foodKey, successor))
+            if child > v:
+                v, best = child, each
+        self.store(key, depth, v, TranspositionTable.EXACT, best)
+        return v
+
+    def min_value(self, state, depth, index, foodKey):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        key, entry = self.probe(state, foodKey, index)
+        if entry is not None and entry[1] >= depth:
+            self.table.hits += 1
+            return entry[2]
+        v, best = float("inf"), None
+        for each in state.getLegalActions(index):
+            successor = state.generateSuccessor(index, each)
+            if index == state.getNumAgents() - 1:
+                child = self.max_value(successor, depth - 1, 0, self.childFoodKey(foodKey, successor))
+            else:
+                child = self.min_value(successor, depth, index + 1, self.childFoodKey(foodKey, successor))
+            if child < v:
+                v, best = child, each
+        self.store(key, depth, v, TranspositionTable.EXACT, best)
+        return v
+
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
@@ -177,41 +550,91 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         Returns the minimax action using self.depth and self.evaluationFunction
         """
         "*** YOUR CODE HERE ***"
-
-        def max_value(state, depth, index, alpha, beta):
-            if state.isWin() or state.isLose() or depth == 0:
-                return self.evaluationFunction(state)
-            v = -float("inf")
-            for each in state.getLegalActions(index):
-                v = max(v, min_value(state.generateSuccessor(index, each), depth, index + 1, alpha, beta))
-                if v > beta:
-                    return v
-                alpha = max(alpha, v)
-            return v
-
-        def min_value(state, depth, index, alpha, beta):
-            if state.isWin() or state.isLose() or depth == 0:
-                return self.evaluationFunction(state)
-            v = float("inf")
-            for each in state.getLegalActions(index):
-                if index == gameState.getNumAgents() - 1:
-                    v = min(v, max_value(state.generateSuccessor(index, each), depth - 1, 0, alpha, beta))
-                else:
-                    v = min(v, min_value(state.generateSuccessor(index, each), depth, index + 1, alpha, beta))
-                if v < alpha:
-                    return v
-                beta = min(beta, v)
-            return v
-
         actions = gameState.getLegalActions(0)
-        alpha = -float("inf")
-        beta = float("inf")
-        values = []
-        for each in actions:
-            values.append(min_value(gameState.generateSuccessor(0, each), self.depth, 1, alpha, beta))
-            alpha = max(alpha, values[values.index(max(values))])
+        values = self.rootValues(gameState, actions)
         return actions[values.index(max(values))]
 
+    def rootChildValue(self, gameState, action, alpha, foodKey):
+        successor = gameState.generateSuccessor(0, action)
+        return self.min_value(successor, self.depth, 1, alpha, float("inf"), self.childFoodKey(foodKey, successor))
+
+    def usable(self, entry, depth, alpha, beta):
+        # pruning is strict, so a bound only settles a node when it is strictly outside the window
+        if entry is None or entry[1] < depth:
+            return False
+        value, bound = entry[2], entry[3]
+        return (bound == TranspositionTable.EXACT or (bound == TranspositionTable.LOWER and value > beta) or
+                (bound == TranspositionTable.UPPER and value < alpha))
+
+    def max_value(self, state, depth, index, alpha, beta, foodKey):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        key, entry = self.probe(state, foodKey, index)
+        if self.usable(entry, depth, alpha, beta):
+            self.table.hits += 1
+            return entry[2]
+        alphaOriginal = alpha
+        v, best = -float("inf"), None
+        for each in self.ordered(state.getLegalActions(index), entry):
+            successor = state.generateSuccessor(index, each)
+            child = self.min_value(successor, depth, index + 1, alpha, beta, self.childFoodKey(foodKey, successor))
+            if child > v:
+                v, best = child, each
+            if v > beta:
+                # a child below the shared alpha may be only an upper bound
+                if v >= self.sharedFloor():
+                    self.store(key, depth, v, TranspositionTable.LOWER, best)
+                return v
+            alpha = max(alpha, v)
+        bound = TranspositionTable.UPPER if v < max(alphaOriginal, self.sharedFloor()) else TranspositionTable.EXACT
+        self.store(key, depth, v, bound, best)
+        return v
+
+    def min_value(self, state, depth, index, alpha, beta, foodKey):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        if self.sharedAlpha is not None:
+            # the best root value found by any worker so far
+            alpha = max(alpha, self.sharedAlpha.value)
+        key, entry = self.probe(state, foodKey, index)
+        if self.usable(entry, depth, alpha, beta):
+            self.table.hits += 1
+            return entry[2]
+        betaOriginal = beta
+        v, best = float("inf"), None
+        for each in self.ordered(state.getLegalActions(index), entry):
+            successor = state.generateSuccessor(index, each)
+            childKey = self.childFoodKey(foodKey, successor)
+            if index == state.getNumAgents() - 1:
+                child = self.max_value(successor, depth - 1, 0, alpha, beta, childKey)
+            else:
+                child = self.min_value(successor, depth, index + 1, alpha, beta, childKey)
+            if child < v:
+                v, best = child, each
+            if v < alpha:
+                self.store(key, depth, v, TranspositionTable.UPPER, best)
+                return v
+            beta = min(beta, v)
+        if v < self.sharedFloor():
+            bound = TranspositionTable.UPPER
+        elif v > betaOriginal:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.store(key, depth, v, bound, best)
+        return v
+
+    def sharedFloor(self):
+        """
+        The shared alpha when the root is split over workers.  A ghost node
+        raises its alpha to it on entry, so it may return a value below it
+        that is only an upper bound; a node whose value is below it cannot
+        tell which of its children did, and stores at most an upper bound.
+        """
+        if self.sharedAlpha is None:
+            return -float("inf")
+        return self.sharedAlpha.value
+
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
@@ -226,24 +649,504 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         legal moves.
         """
         "*** YOUR CODE HERE ***"
+        actions = gameState.getLegalActions(0)
+        value = self.rootValues(gameState, actions)
+        return actions[value.index(max(value))]
 
-        def Expectiminimax_value(state, depth, index):
-            if state.isWin() or state.isLose() or depth == 0:
-                return self.evaluationFunction(state)
-            actions = state.getLegalActions(index)
-            if index == state.getNumAgents() - 1:
-                value = [Expectiminimax_value(state.generateSuccessor(index, each), depth - 1, 0) for each in
-                         actions]
+    def rootChildValue(self, gameState, action, alpha, foodKey):
+        successor = gameState.generateSuccessor(0, action)
+        return self.Expectiminimax_value(successor, self.depth, 1, self.childFoodKey(foodKey, successor))
+
+    def Expectiminimax_value(self, state, depth, index, foodKey):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        # expected values depend on the depth they were searched to, so only reuse the same depth
+        key, entry = self.probe(state, foodKey, index)
+        if entry is not None and entry[1] == depth:
+            self.table.hits += 1
+            return entry[2]
+        actions = state.getLegalActions(index)
+        successors = [state.generateSuccessor(index, each) for each in actions]
+        if index == state.getNumAgents() - 1:
+            value = [self.Expectiminimax_value(successor, depth - 1, 0, self.childFoodKey(foodKey, successor))
+                     for successor in successors]
+        else:
+            value = [self.Expectiminimax_value(successor, depth, index + 1, self.childFoodKey(foodKey, successor))
+                     for successor in successors]
+        if index == 0:
+            result = max(value)
+            self.store(key, depth, result, TranspositionTable.EXACT, actions[value.index(result)])
+            return result
+        result = sum(value) / len(value)
+        self.store(key, depth, result, TranspositionTable.EXACT, None)
+        return result
+
+
+class StarExpectimaxAgent(ExpectimaxAgent):
+    """
+    Expectimax with Ballard's Star1 pruning of chance nodes, using the value
+    bounds declared for the evaluation function (declareEvaluationBounds).
+
+    A ghost node that has averaged some of its children knows that each
+    remaining child is worth at most the upper bound, so once even that
+    cannot lift the average above alpha the node is cut, and each child is
+    searched with the alpha that would make it so.  Values are summed in
+    the same order as ExpectimaxAgent, so the actions chosen are exactly the
+    same; without declared bounds this is plain expectimax.
+
+    Star2 probes one move of every successor to raise the lower bounds used
+    for cutoffs above beta, but with Pacman as the only maximizer and an
+    open window at the root those never happen: the ghost nodes only ever
+    fail low.  star=2 therefore probes for the upper bounds instead: before
+    a ghost node is searched, its terminal and depth-limit children are
+    evaluated outright and every other child gets its own, tighter bounds.
+    That means generating every child of a node that may then be cut, and
+    with the bounds of scoreBounds it generates more states than star=1.
+
+    tableSize and workers are passed on to ExpectimaxAgent; the table is
+    only used for evaluation functions without declared bounds.
+
+    > python pacman.py -p StarExpectimaxAgent -l smallClassic -a depth=3
+    """
+
+    # keeps rounding errors in the derived windows from cutting a node
+    # whose exact average would just beat alpha
+    MARGIN = 1e-9
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', star='1', tableSize='0', workers='1'):
+        ExpectimaxAgent.__init__(self, evalFn, depth, tableSize, workers)
+        self.star = int(star)
+        self.boundsFn = evaluationBounds.get(self.evaluationFunction)
+
+    def rootChildValue(self, gameState, action, alpha, foodKey):
+        if self.boundsFn is None:
+            return ExpectimaxAgent.rootChildValue(self, gameState, action, alpha, foodKey)
+        return self.chance_value(gameState.generateSuccessor(0, action), self.depth, 1, alpha, float("inf"))
+
+    def max_value(self, state, depth, alpha, beta):
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        self.nodes += 1
+        v = -float("inf")
+        for each in state.getLegalActions(0):
+            v = max(v, self.chance_value(state.generateSuccessor(0, each), depth, 1, max(alpha, v), beta))
+            if v >= beta:
+                return v
+        return v
+
+    def chance_value(self, state, depth, index, alpha, beta):
+        """
+        The average over the ghost's moves if it lies inside (alpha, beta),
+        otherwise a bound on the wrong side of the window.
+        """
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        self.nodes += 1
+        last = index == state.getNumAgents() - 1
+        nextDepth = depth - 1 if last else depth
+        actions = state.getLegalActions(index)
+        n = len(actions)
+        successors, known = [None] * n, [None] * n
+        if self.star >= 2:
+            bounds = []
+            for i, each in enumerate(actions):
+                successors[i] = successor = state.generateSuccessor(index, each)
+                if successor.isWin() or successor.isLose() or nextDepth == 0:
+                    known[i] = self.evaluationFunction(successor)
+                    bounds.append((known[i], known[i]))
+                else:
+                    bounds.append(self.boundsFn(successor, depth - 1))
+        else:
+            # Pacman has already moved this round
+            bounds = [self.boundsFn(state, depth - 1)] * n
+        # the bounds of the children after each one, summed from the end
+        lowerRests, upperRests = [0] * n, [0] * n
+        for i in range(n - 2, -1, -1):
+            lowerRests[i] = lowerRests[i + 1] + bounds[i + 1][0]
+            upperRests[i] = upperRests[i + 1] + bounds[i + 1][1]
+        total = 0
+        for i, each in enumerate(actions):
+            lowerRest, upperRest = lowerRests[i], upperRests[i]
+            successor = successors[i] if successors[i] is not None else state.generateSuccessor(index, each)
+            if alpha == -float("inf"):
+                childAlpha = -float("inf")
+            else:
+                childAlpha = n * alpha - total - upperRest - self.MARGIN * (1 + abs(n * alpha) + abs(upperRest))
+            if beta == float("inf"):
+                childBeta = float("inf")
+            else:
+                childBeta = n * beta - total - lowerRest + self.MARGIN * (1 + abs(n * beta) + abs(lowerRest))
+            if known[i] is not None:
+                v = known[i]
+            elif last:
+                v = self.max_value(successor, nextDepth, childAlpha, childBeta)
             else:
-                value = [Expectiminimax_value(state.generateSuccessor(index, each), depth, index + 1) for each in
-                         actions]
-            if index == 0:
-                return max(value)
-            return sum(value) / len(value)
+                v = self.chance_value(successor, nextDepth, index + 1, childAlpha, childBeta)
+            total += v
+            if v <= childAlpha:
+                return (total + upperRest) / n
+            if v >= childBeta:
+                return (total + lowerRest) / n
+        return total / n
 
+
+class SearchTimeout(Exception):
+    "Raised inside a search when the move's deadline has passed"
+    pass
+
+
+class IterativeDeepeningAgent(MultiAgentSearchAgent):
+    """
+    Alpha-beta search deepened one round at a time until timeLimit seconds
+    per move run out; the move of the deepest completed iteration is played.
+
+    Moves are ordered by, in turn, the principal variation of the previous
+    iteration, the two killer moves that last caused a cutoff at the same
+    ply, and a history score that grows with every cutoff a move causes in a
+    position.  ordering=0 turns all of this off for comparison.  With
+    tableSize above 0 the best move stored for a position by the previous
+    iteration is tried before all of these, and entries deep enough for the
+    current iteration cut the search off as in AlphaBetaAgent.
+
+    The search makes and takes back moves on one SearchState instead of
+    generating a GameState per node; inPlace=0 generates successors as the
+    other agents do.
+
+    > python pacman.py -l mediumClassic -p IterativeDeepeningAgent -a timeLimit=0.2,evalFn=better
+    """
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', tableSize='0', timeLimit='0.5',
+                 maxDepth='50', ordering='1', inPlace='1'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize)
+        self.timeLimit = float(timeLimit)
+        self.maxDepth = int(maxDepth)
+        self.ordering = ordering not in ('0', 'False', False)
+        self.inPlace = inPlace not in ('0', 'False', False)
+        self.depths = []
+
+    def getAction(self, gameState):
+        self.deadline = time.time() + self.timeLimit
+        self.history = util.Counter()
+        self.killers = {}
+        self.numAgents = gameState.getNumAgents()
         actions = gameState.getLegalActions(0)
-        value = [Expectiminimax_value(gameState.generateSuccessor(0, each), self.depth, 1) for each in actions]
-        return actions[value.index(max(value))]
+        bestAction, self.principalVariation = actions[0], []
+        state = SearchState(gameState) if self.inPlace else gameState
+        foodKey = self.foodKey(gameState)
+        self.startSearch()
+        completed = 0
+        try:
+            for depth in range(1, self.maxDepth + 1):
+                value, variation = self.alphaBeta(state, depth, 0, 0, -float("inf"), float("inf"), True, foodKey)
+                bestAction, self.principalVariation = variation[0], variation
+                completed = depth
+                if abs(value) == float("inf"):
+                    break  # the game is decided within this depth
+        except SearchTimeout:
+            pass
+        self.depths.append(completed)
+        return bestAction
+
+    def orderMoves(self, state, actions, index, ply, onVariation):
+        if not self.ordering:
+            return actions
+        position = state.getGhostPosition(index) if index else state.getPacmanPosition()
+        def priority(action):
+            if onVariation and ply < len(self.principalVariation) and self.principalVariation[ply] == action:
+                return (0, 0)
+            if action in self.killers.get(ply, ()):
+                return (1, 0)
+            return (2, -self.history[index, position, action])
+        return sorted(actions, key=priority)
+
+    def alphaBeta(self, state, depth, index, ply, alpha, beta, onVariation, foodKey):
+        """
+        Returns (value, principal variation) of a node; depth counts the full
+        rounds left, as in AlphaBetaAgent.  A node settled by the table has
+        an empty variation, so the root never uses the table's values.
+        """
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state), []
+        if time.time() > self.deadline:
+            raise SearchTimeout()
+        key, entry = self.probe(state, foodKey, index)
+        if ply > 0 and self.usable(entry, depth, alpha, beta):
+            self.table.hits += 1
+            return entry[2], []
+        alphaOriginal, betaOriginal = alpha, beta
+        nextIndex = (index + 1) % self.numAgents
+        nextDepth = depth - 1 if nextIndex == 0 else depth
+        maximizing = index == 0
+        best, bestVariation = (-float("inf") if maximizing else float("inf")), []
+        actions = self.orderMoves(state, state.getLegalActions(index), index, ply, onVariation)
+        for rank, action in enumerate(self.ordered(actions, entry)):
+            if self.inPlace:
+                token = state.apply(index, action)
+                value, variation = self.alphaBeta(state, nextDepth, nextIndex, ply + 1, alpha, beta,
+                                                  onVariation and rank == 0, self.appliedFoodKey(foodKey, state, token))
+                state.undo(token)
+            else:
+                successor = state.generateSuccessor(index, action)
+                value, variation = self.alphaBeta(successor, nextDepth, nextIndex, ply + 1, alpha, beta,
+                                                  onVariation and rank == 0, self.childFoodKey(foodKey, successor))
+            if (maximizing and value > best) or (not maximizing and value < best) or not bestVariation:
+                best, bestVariation = value, [action] + variation
+            if maximizing:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+            if alpha >= beta:
+                killers = self.killers.setdefault(ply, [])
+                if action not in killers:
+                    killers.insert(0, action)
+                    del killers[2:]
+                position = state.getGhostPosition(index) if index else state.getPacmanPosition()
+                self.history[index, position, action] += depth * depth
+                break
+        if best >= betaOriginal:
+            bound = TranspositionTable.LOWER
+        elif best <= alphaOriginal:
+            bound = TranspositionTable.UPPER
+        else:
+            bound = TranspositionTable.EXACT
+        self.store(key, depth, best, bound, bestVariation[0] if bestVariation else None)
+        return best, bestVariation
+
+    def usable(self, entry, depth, alpha, beta):
+        # cutoffs here are not strict (alpha >= beta), so neither are the bounds
+        if entry is None or entry[1] < depth:
+            return False
+        value, bound = entry[2], entry[3]
+        return (bound == TranspositionTable.EXACT or (bound == TranspositionTable.LOWER and value >= beta) or
+                (bound == TranspositionTable.UPPER and value <= alpha))
+
+    def appliedFoodKey(self, foodKey, state, token):
+        "The food key after the move of token was applied to state, as childFoodKey"
+        if foodKey is None:
+            return None
+        foodTable, capsuleTable = zobristTable(state.layout.width, state.layout.height)
+        foodEaten, capsuleEaten = token[2], token[3]
+        if foodEaten is not None:
+            foodKey ^= foodTable[foodEaten[0]][foodEaten[1]]
+        if capsuleEaten is not None:
+            x, y = capsuleEaten[1]
+            foodKey ^= capsuleTable[x][y]
+        return foodKey
+
+    def final(self, state):
+        if self.depths:
+            print('[IterativeDeepeningAgent] %d moves, %d nodes, average depth %.2f, deepest %d' %
+                  (len(self.depths), self.nodes, sum(self.depths) / float(len(self.depths)), max(self.depths)))
+        self.depths = []
+        MultiAgentSearchAgent.final(self, state)
+        self.nodes = 0
+
+
+class MonteCarloNode:
+    """
+    A state where Pacman is to move.  edges maps each tried action to a
+    MonteCarloEdge holding its statistics and the nodes it led to.  The
+    state itself is not kept: it is rebuilt by playing the moves from the
+    root on a SearchState.
+    """
+
+    def __init__(self, state):
+        self.visits = 0
+        self.actions = state.getLegalActions(0)
+        self.edges = {}
+
+
+class MonteCarloEdge:
+    """
+    One Pacman action and the ghost replies sampled after it.  outcomes maps
+    each reply, the tuple of the ghosts' actions, to its node and counts how
+    often it was sampled.
+    """
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.outcomes = {}
+        self.counts = util.Counter()
+
+    def mean(self):
+        return self.total / self.visits
+
+
+class MonteCarloAgent(MultiAgentSearchAgent):
+    """
+    Monte Carlo tree search with UCT.
+
+    Every iteration walks down the tree choosing Pacman's actions by UCB1
+    and sampling each ghost's move uniformly at random, as ExpectimaxAgent
+    assumes, adds one node and plays a rollout of at most horizon rounds
+    from it.  The rollout value is evalFn at the last state (the score if
+    the evaluation is infinite, as betterEvaluationFunction is on losing
+    states), and it is averaged into every action on the way down.
+
+    The moves of an iteration are made in place on one SearchState and
+    taken back at its end, so no GameState is copied per ply.
+
+    Arguments, as strings like the other agents:
+
+      policy:     'random' or 'greedy' rollouts; greedy plays the move whose
+                  successor scores best under betterEvaluationFunction
+      horizon:    the number of rounds of a rollout
+      iterations: iterations per move; if 0, iterate for timeLimit seconds
+      explore:    the UCB1 exploration constant, in points of score
+      widening:   an action keeps at most widening * sqrt(visits) distinct
+                  ghost replies; past that, known replies are resampled, so
+                  the tree still grows deep when many ghosts move at random
+      reuse:      keep the subtree below the move played and the ghost
+                  replies actually seen as the next root
+
+    > python pacman.py -l mediumClassic -p MonteCarloAgent -a timeLimit=0.2,policy=greedy
+    > python searchBenchmark.py -m 0.05
+    """
+
+    def __init__(self, evalFn='scoreEvaluationFunction', policy='random', horizon='10', iterations='0',
+                 timeLimit='0.2', explore='50', widening='2', reuse='1'):
+        MultiAgentSearchAgent.__init__(self, evalFn)
+        self.policy = {'random': self.randomPolicy, 'greedy': self.greedyPolicy}[policy]
+        self.horizon = int(horizon)
+        self.iterations = int(iterations)
+        self.timeLimit = float(timeLimit)
+        self.explore = float(explore)
+        self.widening = float(widening)
+        self.reuse = reuse not in ('0', 'False', False)
+        self.root, self.rootState, self.lastAction = None, None, None
+        self.moves = self.reused = self.totalIterations = 0
+
+    def registerInitialState(self, gameState):
+        self.root, self.rootState, self.lastAction = None, None, None
+
+    def getAction(self, gameState):
+        self.root = self.nextRoot(gameState)
+        self.rootState = gameState
+        if self.root.visits:
+            self.reused += 1
+        state = SearchState(gameState)
+        deadline = time.time() + self.timeLimit
+        iterations = 0
+        while (iterations < self.iterations if self.iterations > 0 else
+               iterations == 0 or time.time() < deadline):
+            self.iterate(self.root, state)
+            iterations += 1
+        self.moves += 1
+        self.totalIterations += iterations
+        edges = self.root.edges
+        self.lastAction = max(edges, key=lambda action: (edges[action].visits, edges[action].mean()))
+        return self.lastAction
+
+    def nextRoot(self, gameState):
+        "The node of gameState in the previous tree, or a new one"
+        if self.reuse and self.root is not None and self.lastAction in self.root.edges:
+            # a ghost's direction is the action it last took
+            reply = tuple(ghostState.configuration.direction for ghostState in gameState.getGhostStates())
+            node = self.root.edges[self.lastAction].outcomes.get(reply)
+            if node is not None:
+                # check that gameState really follows the previous root
+                state = SearchState(self.rootState)
+                self.playRound(state, self.lastAction, [], reply)
+                data = gameState.data
+                if (state.agentStates == data.agentStates and state.food == data.food and
+                        state.capsules == data.capsules and state.score == data.score):
+                    return node
+        return MonteCarloNode(gameState)
+
+    def iterate(self, root, state):
+        node, path, moves = root, [], []
+        while not (state.isWin() or state.isLose()):
+            untried = [action for action in node.actions if action not in node.edges]
+            if untried:
+                action = random.choice(untried)
+                node.edges[action] = MonteCarloEdge()
+            else:
+                action = self.select(node)
+            edge = node.edges[action]
+            path.append((node, edge))
+            child, isNew = self.sampleOutcome(state, action, edge, moves)
+            node = child
+            if isNew:
+                break
+        value = self.rollout(state, moves)
+        for token in reversed(moves):
+            state.undo(token)
+        for node, edge in path:
+            node.visits += 1
+            edge.visits += 1
+            edge.total += value
+
+    def select(self, node):
+        "The action with the highest UCB1 value"
+        logVisits = math.log(node.visits)
+        def ucb(action):
+            edge = node.edges[action]
+            return edge.mean() + self.explore * math.sqrt(logVisits / edge.visits)
+        return max(node.actions, key=ucb)
+
+    def sampleOutcome(self, state, action, edge, moves):
+        """
+        Plays action and one round of ghost replies on state, resampling a
+        known reply once the edge is wide enough, and returns (node, isNew)
+        for the result.
+        """
+        if edge.outcomes and len(edge.outcomes) >= self.widening * math.sqrt(edge.visits + 1):
+            known = list(edge.counts)
+            reply = self.playRound(state, action, moves,
+                                   random.choices(known, [edge.counts[each] for each in known])[0])
+        else:
+            reply = self.playRound(state, action, moves)
+        edge.counts[reply] += 1
+        if reply in edge.outcomes:
+            return edge.outcomes[reply], False
+        edge.outcomes[reply] = MonteCarloNode(state)
+        return edge.outcomes[reply], True
+
+    def playRound(self, state, action, moves, reply=None):
+        """
+        Pacman's action followed by the ghosts' actions in reply, or by a
+        uniformly random move of every ghost, made on state with the undo
+        tokens appended to moves.  Returns the ghosts' actions.
+        """
+        moves.append(state.apply(0, action))
+        actions = []
+        for index in range(1, state.getNumAgents()):
+            if state.isWin() or state.isLose():
+                break
+            ghostAction = reply[index - 1] if reply is not None else random.choice(state.getLegalActions(index))
+            moves.append(state.apply(index, ghostAction))
+            actions.append(ghostAction)
+        return tuple(actions)
+
+    def rollout(self, state, moves):
+        for _ in range(self.horizon):
+            if state.isWin() or state.isLose():
+                break
+            self.playRound(state, self.policy(state), moves)
+        value = self.evaluationFunction(state)
+        if abs(value) == float("inf"):
+            return state.getScore()
+        return value
+
+    def randomPolicy(self, state):
+        return random.choice(state.getLegalActions(0))
+
+    def greedyPolicy(self, state):
+        actions = state.getLegalActions(0)
+        values = []
+        for action in actions:
+            token = state.apply(0, action)
+            values.append(betterEvaluationFunction(state))
+            state.undo(token)
+        best = max(values)
+        return random.choice([action for action, value in zip(actions, values) if value == best])
+
+    def final(self, state):
+        if self.moves:
+            print('[MonteCarloAgent] %d moves, %.0f iterations per move, %d roots reused' %
+                  (self.moves, self.totalIterations / float(self.moves), self.reused))
+        self.moves = self.reused = self.totalIterations = 0
 
 
 def betterEvaluationFunction(currentGameState):
@@ -281,5 +1184,41 @@ def betterEvaluationFunction(currentGameState):
     return score + 1 / minDistFood - 2.0 / minDistGhost
 
 
+def betterEvaluationBounds(state, moves):
+    "betterEvaluationFunction is at most twice the score plus 2, and -inf on losing states"
+    lower, upper = scoreBounds(state, moves)
+    return -float('inf'), 2 * upper + 2
+
+declareEvaluationBounds(betterEvaluationFunction, betterEvaluationBounds)
+
+def mazeEvaluationFunction(currentGameState):
+    """
+    An evaluation that measures maze distances instead of Manhattan ones,
+    read from the per-layout fields of distanceFields: the distance to the
+    nearest food and capsule, and to every ghost, which is worse the deeper
+    Pacman stands in a dead end and worth chasing while the ghost stays
+    scared long enough to be caught.
+    """
+    if currentGameState.isWin() or currentGameState.isLose():
+        return currentGameState.getScore()
+    fields = distanceFields.distanceFields(currentGameState.getWalls())
+    position = currentGameState.getPacmanPosition()
+    cell = fields.index(position)
+    value = currentGameState.getScore()
+    food = currentGameState.getFood()
+    value -= 1.5 * fields.nearestFood(food, not isinstance(currentGameState, SearchState))[cell]
+    capsules = currentGameState.getCapsules()
+    if capsules:
+        value -= 0.5 * min(fields.fieldFrom(capsule)[cell] for capsule in capsules)
+    for ghost in currentGameState.getGhostStates():
+        distance = fields.fieldFrom(ghost.getPosition())[cell]
+        if ghost.scaredTimer > distance:
+            value += 50.0 / (distance + 1)
+        elif distance <= 3:
+            value -= (4 - distance) * (10 + 5 * fields.deadEndDepth[cell])
+    return value
+
+
 # Abbreviation
 better = betterEvaluationFunction
+maze = mazeEvaluationFunction
@@ -262,6 +262,169 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+
+class SearchState:
+    """
+    A mutable copy of a GameState for game-tree search.
+
+    apply(agentIndex, action) makes a move in place, following the same
+    rules as GameState.generateSuccessor, and returns a token; undo(token)
+    takes that move back, so moves must be undone in the reverse order.
+    Nothing is copied per move, and apply does not check legality: it is
+    meant for actions that come from getLegalActions of the same state.
+
+    The accessors used by evaluation functions (getScore, getFood,
+    getPacmanPosition, getGhostStates, ...) behave as on a GameState, but
+    what they return changes with the next apply, so copy anything that
+    must be kept.  A SearchState does not record GameState.explored.
+    """
+
+    def __init__(self, gameState):
+        data = gameState.data
+        self.layout = data.layout
+        self.walls = data.layout.walls
+        self.food = data.food.copy()
+        self.numFood = self.food.count()
+        self.capsules = list(data.capsules)
+        self.agentStates = [agentState.copy() for agentState in data.agentStates]
+        self.score = data.score
+        self._win, self._lose = data._win, data._lose
+
+    def getLegalActions(self, agentIndex=0):
+        if self._win or self._lose:
+            return []
+        configuration = self.agentStates[agentIndex].configuration
+        possible = Actions.getPossibleActions(configuration, self.walls)
+        if agentIndex == 0:
+            return possible
+        # ghosts cannot stop, and only turn around at dead ends
+        if Directions.STOP in possible:
+            possible.remove(Directions.STOP)
+        reverse = Actions.reverseDirection(configuration.direction)
+        if reverse in possible and len(possible) > 1:
+            possible.remove(reverse)
+        return possible
+
+    def apply(self, agentIndex, action):
+        """
+        Moves an agent in place and returns the token that undoes the move.
+        """
+        agentStates = self.agentStates
+        score, win, lose = self.score, self._win, self._lose
+        foodEaten, capsuleEaten = None, None
+        if agentIndex == 0:
+            saved = [(agentState.configuration, agentState.scaredTimer) for agentState in agentStates]
+            pacmanState = agentStates[0]
+            vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
+            pacmanState.configuration = pacmanState.configuration.generateSuccessor(vector)
+            position = pacmanState.configuration.getPosition()
+            nearest = nearestPoint(position)
+            if manhattanDistance(nearest, position) <= 0.5:
+                x, y = nearest
+                if self.food[x][y]:
+                    self.score += 10
+                    self.food[x][y] = False
+                    self.numFood -= 1
+                    foodEaten = nearest
+                    if self.numFood == 0 and not self._lose:
+                        self.score += 500
+                        self._win = True
+                if nearest in self.capsules:
+                    capsuleEaten = (self.capsules.index(nearest), nearest)
+                    del self.capsules[capsuleEaten[0]]
+                    for ghostState in agentStates[1:]:
+                        ghostState.scaredTimer = SCARED_TIME
+            self.score -= TIME_PENALTY
+            for index in range(1, len(agentStates)):
+                self.checkDeath(index)
+        else:
+            ghostState = agentStates[agentIndex]
+            saved = (ghostState.configuration, ghostState.scaredTimer)
+            speed = GhostRules.GHOST_SPEED
+            if ghostState.scaredTimer > 0:
+                speed /= 2.0
+            vector = Actions.directionToVector(action, speed)
+            ghostState.configuration = ghostState.configuration.generateSuccessor(vector)
+            GhostRules.decrementTimer(ghostState)
+            self.checkDeath(agentIndex)
+        return (agentIndex, saved, foodEaten, capsuleEaten, score, win, lose)
+
+    def checkDeath(self, ghostIndex):
+        ghostState = self.agentStates[ghostIndex]
+        if not GhostRules.canKill(self.agentStates[0].configuration.getPosition(),
+                                  ghostState.configuration.getPosition()):
+            return
+        if ghostState.scaredTimer > 0:
+            self.score += 200
+            ghostState.configuration = ghostState.start
+            ghostState.scaredTimer = 0
+        elif not self._win:
+            self.score -= 500
+            self._lose = True
+
+    def undo(self, token):
+        agentIndex, saved, foodEaten, capsuleEaten, self.score, self._win, self._lose = token
+        if agentIndex == 0:
+            for agentState, (configuration, scaredTimer) in zip(self.agentStates, saved):
+                agentState.configuration, agentState.scaredTimer = configuration, scaredTimer
+            if foodEaten is not None:
+                self.food[foodEaten[0]][foodEaten[1]] = True
+                self.numFood += 1
+            if capsuleEaten is not None:
+                self.capsules.insert(*capsuleEaten)
+        else:
+            ghostState = self.agentStates[agentIndex]
+            ghostState.configuration, ghostState.scaredTimer = saved
+
+    def getPacmanState(self):
+        return self.agentStates[0].copy()
+
+    def getPacmanPosition(self):
+        return self.agentStates[0].getPosition()
+
+    def getGhostStates(self):
+        return self.agentStates[1:]
+
+    def getGhostState(self, agentIndex):
+        return self.agentStates[agentIndex]
+
+    def getGhostPosition(self, agentIndex):
+        return self.agentStates[agentIndex].getPosition()
+
+    def getGhostPositions(self):
+        return [s.getPosition() for s in self.agentStates[1:]]
+
+    def getNumAgents(self):
+        return len(self.agentStates)
+
+    def getScore(self):
+        return float(self.score)
+
+    def getCapsules(self):
+        return self.capsules
+
+    def getNumFood(self):
+        return self.numFood
+
+    def getFood(self):
+        return self.food
+
+    def getWalls(self):
+        return self.walls
+
+    def hasFood(self, x, y):
+        return self.food[x][y]
+
+    def hasWall(self, x, y):
+        return self.walls[x][y]
+
+    def isLose(self):
+        return self._lose
+
+    def isWin(self):
+        return self._win
+
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
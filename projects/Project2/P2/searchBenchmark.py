@@ -0,0 +1,250 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A repeatable benchmark of the adversarial search agents.
+
+Each layout contributes a few fixed positions: its start and the states
+reached from it by seeded random moves of all the agents.  Every agent picks
+a move in every position at every depth, and for each (agent, layout, depth)
+the benchmark records
+
+  expanded       states generated, as counted by GameState.explored (the
+                 measure the autograder uses)
+  nodes          nodes searched, as counted by the agent
+  nodesPerSecond nodes / seconds
+  timePerMove    seconds / positions
+  actions        the move chosen in each position
+  agreement      the fraction of those moves that match the reference agent
+                 (MinimaxAgent at the same depth by default)
+
+and writes the results as JSON.  A saved run can be compared with a new one,
+or two saved runs with each other, to check an optimisation:
+
+> python searchBenchmark.py -o before.json
+> python searchBenchmark.py -o after.json -c before.json
+> python searchBenchmark.py -c before.json --against after.json
+
+-p, -l and -d pick a subset of the agents, layouts and depths.
+
+MonteCarloAgent has no depth; -m instead counts the UCT iterations it fits
+in a time limit per move on the same positions:
+
+> python searchBenchmark.py -m 0.05
+"""
+
+import json
+import random
+import sys
+import time
+
+import layout
+import multiAgents
+from pacman import GameState
+from pacman import parseAgentArgs
+
+LAYOUTS = ['minimaxClassic', 'trappedClassic', 'smallClassic', 'mediumClassic']
+AGENTS = ['MinimaxAgent', 'AlphaBetaAgent', 'ExpectimaxAgent']
+
+
+def benchmarkPositions(layoutName, numPositions, seed, spacing=5):
+    """
+    The start of a layout followed by the positions reached after every
+    spacing rounds of random legal moves, skipping any that end the game.
+    The same seed always gives the same positions.
+    """
+    theLayout = layout.getLayout(layoutName)
+    if theLayout is None:
+        raise Exception("The layout " + layoutName + " cannot be found")
+    rng = random.Random('%s:%d' % (layoutName, seed))
+    start = GameState()
+    start.initialize(theLayout, theLayout.getNumGhosts())
+    positions, state, rounds = [start], start, 0
+    while len(positions) < numPositions:
+        for agentIndex in range(state.getNumAgents()):
+            state = state.generateSuccessor(agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+            if state.isWin() or state.isLose():
+                state, rounds = start, 0
+                break
+        else:
+            rounds += 1
+            if rounds % spacing == 0:
+                positions.append(state)
+    GameState.getAndResetExplored()
+    return positions
+
+
+def measure(agent, positions):
+    "Asks agent for a move in every position and returns the result dictionary"
+    actions, expanded, seconds = [], 0, 0.0
+    agent.nodes = 0
+    GameState.getAndResetExplored()
+    for state in positions:
+        start = time.time()
+        actions.append(agent.getAction(state))
+        seconds += time.time() - start
+        expanded += len(GameState.getAndResetExplored())
+    return {'actions': actions, 'expanded': expanded, 'nodes': agent.nodes, 'seconds': seconds,
+            'timePerMove': seconds / len(positions),
+            'nodesPerSecond': agent.nodes / seconds if seconds > 0 else 0.0}
+
+
+def agreement(actions, reference):
+    if not reference:
+        return None
+    return sum(a == b for a, b in zip(actions, reference)) / float(len(reference))
+
+
+def runBenchmark(agents=AGENTS, layouts=LAYOUTS, depths=(1, 2, 3, 4), numPositions=5, seed=0,
+                 evalFn='scoreEvaluationFunction', agentArgs=None, reference='MinimaxAgent'):
+    """
+    Runs every agent at every depth on the positions of every layout.  The
+    reference agent is searched too, even if it is not one of agents.
+    """
+    results = []
+    for layoutName in layouts:
+        positions = benchmarkPositions(layoutName, numPositions, seed)
+        for depth in depths:
+            referenceActions = None
+            for agentName in ([reference] if reference not in agents else []) + list(agents):
+                args = dict(agentArgs or {})
+                args.update(evalFn=evalFn, depth=str(depth))
+                agent = getattr(multiAgents, agentName)(**args)
+                result = measure(agent, positions)
+                if agentName == reference:
+                    referenceActions = result['actions']
+                    if agentName not in agents:
+                        continue
+                result.update(agent=agentName, layout=layoutName, depth=depth,
+                              agreement=agreement(result['actions'], referenceActions))
+                results.append(result)
+                print('%-16s %-15s d%d  expanded %9d  nodes %9d  %9.0f nodes/s  %8.3fs/move  agree %s' %
+                      (agentName, layoutName, depth, result['expanded'], result['nodes'],
+                       result['nodesPerSecond'], result['timePerMove'], formatFraction(result['agreement'])))
+                sys.stdout.flush()
+    return {'positions': numPositions, 'seed': seed, 'evalFn': evalFn, 'agentArgs': agentArgs or {},
+            'reference': reference, 'results': results}
+
+
+def monteCarloIterations(layouts=LAYOUTS, timeLimit=0.05, numPositions=5, seed=0, agentArgs=None):
+    """
+    Gives MonteCarloAgent timeLimit seconds in every position of every
+    layout, without reusing the tree of the previous position, and prints
+    the UCT iterations it runs per move.  Returns them by layout.
+    """
+    iterations = {}
+    for layoutName in layouts:
+        args = dict(agentArgs or {})
+        args.update(timeLimit=str(timeLimit), reuse='0')
+        agent = multiAgents.MonteCarloAgent(**args)
+        for state in benchmarkPositions(layoutName, numPositions, seed):
+            agent.getAction(state)
+        iterations[layoutName] = agent.totalIterations / float(agent.moves)
+        print('%-16s %-15s %6.3fs/move  %8.1f iterations/move' %
+              ('MonteCarloAgent', layoutName, timeLimit, iterations[layoutName]))
+        sys.stdout.flush()
+    GameState.getAndResetExplored()
+    return iterations
+
+
+def formatFraction(fraction):
+    return '-' if fraction is None else '%3.0f%%' % (100 * fraction)
+
+
+def compare(before, after):
+    """
+    Prints, for each (agent, layout, depth) present in both runs, the change
+    in states expanded and time per move and how often the two runs chose
+    the same move.  Returns the number of entries whose moves differ.
+    """
+    def key(result):
+        return result['agent'], result['layout'], result['depth']
+    old = dict((key(result), result) for result in before['results'])
+    if before.get('seed') != after.get('seed') or before.get('positions') != after.get('positions'):
+        print('Warning: the two runs searched different positions')
+    changed = compared = 0
+    print('%-16s %-15s %3s %11s %11s %8s %9s %9s %8s %6s' %
+          ('agent', 'layout', 'd', 'expanded', 'before', 'ratio', 's/move', 'before', 'speedup', 'same'))
+    for result in after['results']:
+        if key(result) not in old:
+            continue
+        previous = old[key(result)]
+        compared += 1
+        same = agreement(result['actions'], previous['actions'])
+        if same < 1:
+            changed += 1
+        print('%-16s %-15s %3d %11d %11d %7.2fx %9.3f %9.3f %7.2fx %6s' %
+              (result['agent'], result['layout'], result['depth'], result['expanded'], previous['expanded'],
+               result['expanded'] / float(max(1, previous['expanded'])), result['timePerMove'],
+               previous['timePerMove'], previous['timePerMove'] / max(result['timePerMove'], 1e-9),
+               formatFraction(same)))
+    print('%d of %d entries chose different moves' % (changed, compared))
+    return changed
+
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('python searchBenchmark.py <options>')
+    parser.add_option('-p', '--agents', dest='agents', default=','.join(AGENTS),
+                      help='comma separated agents to benchmark [Default: %default]')
+    parser.add_option('-l', '--layouts', dest='layouts', default=','.join(LAYOUTS),
+                      help='comma separated layouts [Default: %default]')
+    parser.add_option('-d', '--depths', dest='depths', default='1,2,3,4',
+                      help='comma separated search depths [Default: %default]')
+    parser.add_option('-n', '--positions', dest='positions', type='int', default=5,
+                      help='positions per layout [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='the seed of the positions [Default: %default]')
+    parser.add_option('-e', '--evalFn', dest='evalFn', default='scoreEvaluationFunction',
+                      help='the evaluation function [Default: %default]')
+    parser.add_option('-a', '--agentArgs', dest='agentArgs',
+                      help='comma separated extra agent arguments, e.g. "tableSize=100000"')
+    parser.add_option('-r', '--reference', dest='reference', default='MinimaxAgent',
+                      help='the agent whose moves the others are checked against [Default: %default]')
+    parser.add_option('-m', '--monteCarlo', dest='monteCarlo', type='float',
+                      help='count the iterations of MonteCarloAgent in this many seconds per move instead')
+    parser.add_option('-o', '--output', dest='output',
+                      help='write the results to this JSON file')
+    parser.add_option('-c', '--compare', dest='compare',
+                      help='compare the results with this earlier JSON file')
+    parser.add_option('--against', dest='against',
+                      help='with --compare, compare with this JSON file instead of running')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    if options.against:
+        with open(options.compare) as f:
+            before = json.load(f)
+        with open(options.against) as f:
+            after = json.load(f)
+        compare(before, after)
+        sys.exit(0)
+    if options.monteCarlo:
+        monteCarloIterations(options.layouts.split(','), options.monteCarlo, options.positions,
+                             options.seed, parseAgentArgs(options.agentArgs))
+        sys.exit(0)
+    run = runBenchmark(options.agents.split(','), options.layouts.split(','),
+                       [int(depth) for depth in options.depths.split(',')], options.positions,
+                       options.seed, options.evalFn, parseAgentArgs(options.agentArgs), options.reference)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(run, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            compare(json.load(f), run)